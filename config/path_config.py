@@ -9,6 +9,19 @@ DATA = "data"
 AUTH = "config/auth"
 
 AUTH_TWITTER = BASE_DIR / "config" / "auth" / "twitter_auth.json"
+# One storage state per X account; AUTH_TWITTER is used when this is empty
+SESSIONS_DIR = BASE_DIR / "config" / "auth" / "sessions"
+
+STATE_DIR = BASE_DIR / DATA / "from_prefect" / "state"
+WATERMARK_PATH = STATE_DIR / "watermarks.json"
+BACKFILL_DIR = STATE_DIR / "backfill"
+SESSION_STATUS_PATH = STATE_DIR / "session_status.json"
+TAG_YIELD_PATH = STATE_DIR / "tag_yield.json"
+# Local copies of the lakeFS key indexes used by incremental loads
+KEY_INDEX_DIR = STATE_DIR / "key_index"
+# Batches written locally before the background upload to lakeFS
+SPOOL_DIR = STATE_DIR / "spool"
+RECORDINGS_DIR = BASE_DIR / DATA / "recordings"
 
 repo_name = "tweets-repo"
 branch_name = "main"
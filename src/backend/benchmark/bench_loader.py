@@ -0,0 +1,107 @@
+import argparse
+import json
+import tempfile
+import time
+import uuid
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+# Import LakeFS loader
+from src.backend.load.lakefs_loader import LakeFSLoader
+# Import storage backends
+from src.backend.load.storage import LakeFSBackend, LocalBackend
+
+BENCH_REPO = "bench-repo"
+TAGS = np.array(["#ธรรมศาสตร์ช้างเผือก", "#TCAS", "#มธ", "#dek70", "#รับตรง", "#ทีมมธ"])
+CATEGORIES = np.array(["ธรรมศาสตร์", "การศึกษา", "ทั่วไป"])
+WORDS = np.array(["สอบ", "ติด", "คณะ", "รอบ", "ประกาศ", "ผล", "มหาลัย", "เรียน", "ค่าย", "TCAS", "dek70", "portfolio"])
+
+def synthetic_tweets(size: int, seed: int = 0, start: str = "2025-01-01", days: int = 30, offset: int = 0) -> pd.DataFrame:
+    # Vectorised so 1M rows build in seconds; offset keeps texts unique across batches
+    rng = np.random.default_rng(seed)
+    post_time = pd.Series(pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days * 86_400, size), unit="s"))
+    words = pd.Series(WORDS[rng.integers(0, len(WORDS), size)])
+    for _ in range(5):
+        words = words + " " + WORDS[rng.integers(0, len(WORDS), size)]
+    data = pd.DataFrame({
+        "category": CATEGORIES[rng.integers(0, len(CATEGORIES), size)],
+        "tag": TAGS[rng.integers(0, len(TAGS), size)],
+        "username": "user" + pd.Series(rng.integers(0, max(size // 20, 1), size)).astype(str),
+        "tweetText": words + " #" + pd.Series(np.arange(offset, offset + size)).astype(str),
+        "postTimeRaw": post_time,
+        "scrapeTime": pd.Timestamp(start) + pd.Timedelta(days=days),
+    })
+    data["year"], data["month"], data["day"] = post_time.dt.year, post_time.dt.month, post_time.dt.day
+    return data
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, round(time.perf_counter() - started, 4)
+
+def bench_size(loader: LakeFSLoader, endpoint: str | None, size: int, batch: int) -> dict:
+    # A fresh dataset per size, so every load starts from an empty path
+    path = f"s3://{BENCH_REPO}/main/tweets-{size}-{uuid.uuid4().hex[:8]}.parquet"
+    data = synthetic_tweets(size)
+    _, load_s = timed(loader.load, data, endpoint, repo_name=BENCH_REPO, lakefs_s3_path=path)
+
+    # Typical micro-batch: half already stored (redelivered), half new
+    fresh = synthetic_tweets(batch // 2, seed=1, start="2025-01-29", days=2, offset=size)
+    redelivered = data.sample(batch - len(fresh), random_state=0)
+    _, incremental_s = timed(loader.incremental_load, pd.concat([fresh, redelivered], ignore_index=True), endpoint, lakefs_s3_path=path)
+    fresh = synthetic_tweets(batch // 2, seed=2, start="2025-01-29", days=2, offset=size + batch)
+    _, scan_s = timed(loader.incremental_load, pd.concat([fresh, redelivered], ignore_index=True), endpoint, lakefs_s3_path=path, use_index=False)
+
+    stored, read_s = timed(loader.read, endpoint, path)
+    _, load_hash_s = timed(loader.load_hash, stored, endpoint, lakefs_s3_path=path)
+    changed, check_hash_s = timed(loader.check_hash, stored, endpoint, lakefs_s3_path=path)
+
+    return {
+        "rows": size,
+        "stored_rows": len(stored),
+        "load_s": load_s,
+        "incremental_index_s": incremental_s,
+        "incremental_scan_s": scan_s,
+        "read_full_s": read_s,
+        "load_hash_s": load_hash_s,
+        "check_hash_s": check_hash_s,
+        "hash_changed": len(changed),
+    }
+
+def run(sizes: list[int], batch: int, lakefs_host: str | None, lakefs_endpoint: str | None) -> list[dict]:
+    # Key index caches go to the scratch directory too, never to the pipeline's state directory
+    with tempfile.TemporaryDirectory(prefix="bench-loader-") as root:
+        cache_dir = Path(root) / "key_index"
+        if lakefs_host:
+            loader = LakeFSLoader(backend=LakeFSBackend(lakefs_host), key_index_dir=cache_dir)
+            return [bench_size(loader, lakefs_endpoint or lakefs_host, size, batch) for size in sizes]
+        loader = LakeFSLoader(backend=LocalBackend(Path(root) / "lakefs"), key_index_dir=cache_dir)
+        return [bench_size(loader, None, size, batch) for size in sizes]
+
+def print_table(rows: list[dict], title: str) -> None:
+    table = Table(title=title)
+    for column in rows[0]:
+        table.add_column(column)
+    for row in rows:
+        table.add_row(*[str(value) for value in row.values()])
+    Console().print(table)
+
+def parse_sizes(value: str) -> list[int]:
+    return [int(size) for size in value.split(",") if size]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time LakeFSLoader load, incremental_load, check_hash and full reads on synthetic tweets.")
+    parser.add_argument("--sizes", type=parse_sizes, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=400, help="Rows per incremental batch, half of them already stored")
+    parser.add_argument("--lakefs", default=None, help="lakeFS host to benchmark instead of the local stand-in, e.g. http://localhost:8001")
+    parser.add_argument("--endpoint", default=None, help="S3 gateway endpoint when it differs from --lakefs")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.batch, args.lakefs, args.endpoint)
+    print_table(results, f"LakeFSLoader on {'lakeFS ' + args.lakefs if args.lakefs else 'the local stand-in'}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
@@ -0,0 +1,113 @@
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from rich.console import Console
+from rich.table import Table
+
+# Import parquet writer profiles
+from src.backend.load.parquet_profiles import PROFILES, WriterProfile
+# Import path configuration
+from config.path_config import BASE_DIR
+
+SAMPLE_PATH = BASE_DIR / "data" / "data.parquet"
+
+def sample_frame(size: int, path: str | Path = SAMPLE_PATH, seed: int = 0) -> pd.DataFrame:
+    # Resample the stored tweets to the requested size, spreading post times over 30 days
+    source = pd.read_parquet(path)
+    if "postTimeRaw" not in source.columns and "timestamp" in source.columns:
+        source = source.rename(columns={"timestamp": "postTimeRaw"})
+    rng = np.random.default_rng(seed)
+    data = source.iloc[rng.integers(0, len(source), size)].reset_index(drop=True)
+    start = pd.to_datetime(data["postTimeRaw"]).dt.tz_localize(None).min()
+    post_time = pd.Series(start + pd.to_timedelta(rng.integers(0, 30 * 86_400, size), unit="s"))
+    data["postTimeRaw"] = post_time
+    # Unique texts, as in the real dataset, so dictionary encoding is not flattered by resampling
+    data["tweetText"] = data["tweetText"] + " " + pd.Series(np.arange(size)).astype(str)
+    data["year"], data["month"], data["day"] = post_time.dt.year, post_time.dt.month, post_time.dt.day
+    return data
+
+def directory_size(path: Path) -> tuple[int, int]:
+    files = list(path.rglob("*.parquet"))
+    return len(files), sum(file.stat().st_size for file in files)
+
+def bench_profile(data: pd.DataFrame, profile: WriterProfile, workdir: Path, repeats: int) -> dict:
+    target = workdir / profile.name
+    write_seconds = []
+    for _ in range(repeats):
+        shutil.rmtree(target, ignore_errors=True)
+        started = time.perf_counter()
+        profile.prepare(data).to_parquet(target, partition_cols=["year", "month", "day"], engine="pyarrow", **profile.options())
+        write_seconds.append(time.perf_counter() - started)
+    files, size = directory_size(target)
+
+    # Typical filtered reads: one day, optionally one tag or a two-hour window, a few columns
+    day = data.iloc[len(data) // 2]
+    start = pd.Timestamp(day["postTimeRaw"]).normalize() + pd.Timedelta(hours=8)
+    dataset = ds.dataset(target, format="parquet", partitioning="hive")
+    day_filter = (ds.field("year") == int(day["year"])) & (ds.field("month") == int(day["month"])) & (ds.field("day") == int(day["day"]))
+    filters = {
+        "day": day_filter,
+        "day+tag": day_filter & (ds.field("tag") == day["tag"]),
+        "day+hours": day_filter & (ds.field("postTimeRaw") >= start) & (ds.field("postTimeRaw") < start + pd.Timedelta(hours=2)),
+    }
+    read_seconds = {}
+    for name, expression in filters.items():
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            dataset.to_table(filter=expression, columns=["postTimeRaw", "username", "tweetText", "tag"])
+            timings.append(time.perf_counter() - started)
+        read_seconds[name] = round(min(timings), 4)
+    started = time.perf_counter()
+    dataset.to_table()
+    full_read = time.perf_counter() - started
+
+    return {
+        "profile": profile.name,
+        "rows": len(data),
+        "files": files,
+        "size_mb": round(size / 1024 / 1024, 2),
+        "write_s": round(min(write_seconds), 4),
+        **{f"read_{name}_s": seconds for name, seconds in read_seconds.items()},
+        "read_full_s": round(full_read, 4),
+    }
+
+def run(sizes: list[int], profiles: list[str], repeats: int, sample_path: str | Path) -> list[dict]:
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench-parquet-") as workdir:
+        for size in sizes:
+            data = sample_frame(size, sample_path)
+            for name in profiles:
+                rows.append(bench_profile(data, PROFILES[name], Path(workdir), repeats))
+    return rows
+
+def print_table(rows: list[dict]) -> None:
+    table = Table(title="Parquet writer profiles")
+    for column in rows[0]:
+        table.add_column(column)
+    for row in rows:
+        table.add_row(*[str(value) for value in row.values()])
+    Console().print(table)
+
+def parse_sizes(value: str) -> list[int]:
+    return [int(size) for size in value.split(",") if size]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare parquet writer profiles on data/data.parquet-shaped data.")
+    parser.add_argument("--sizes", type=parse_sizes, default=[10_000, 100_000])
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma-separated profile names")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--sample", default=str(SAMPLE_PATH), help="Parquet file whose rows are resampled")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.sizes, [name for name in args.profiles.split(",") if name], args.repeats, args.sample)
+    print_table(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
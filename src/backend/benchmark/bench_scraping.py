@@ -0,0 +1,212 @@
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+import psutil
+from playwright.async_api import ElementHandle, Page
+from rich.console import Console
+from rich.table import Table
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import XScraping for scraping
+from src.backend.scraping.x_scraping import XScraping
+# Import browser pool
+from src.backend.scraping.browser_pool import BrowserPool
+# Import adaptive scroll pacing
+from src.backend.scraping.pacing import AdaptivePacer
+# Import columnar record buffer
+from src.backend.scraping.columnar import TweetColumns
+# Import offline replay
+from src.backend.scraping.replay import SnapshotReplay, build_synthetic_search_page
+
+logger = LoggingConfig(level="INFO", level_console="WARNING").get_logger()
+
+BENCH_TAG = "#benchmark"
+
+# Every Playwright call below is one protocol round trip to the browser
+COUNTED_CALLS = {
+    Page: ("evaluate", "query_selector", "query_selector_all", "wait_for_selector"),
+    ElementHandle: ("evaluate", "query_selector", "query_selector_all", "text_content", "get_attribute"),
+}
+
+@contextmanager
+def count_round_trips():
+    counts = Counter()
+    originals = []
+    for cls, names in COUNTED_CALLS.items():
+        for name in names:
+            original = getattr(cls, name)
+            originals.append((cls, name, original))
+
+            def make_wrapper(original, label):
+                async def wrapper(self, *args, **kwargs):
+                    counts[label] += 1
+                    return await original(self, *args, **kwargs)
+                return wrapper
+
+            setattr(cls, name, make_wrapper(original, f"{cls.__name__}.{name}"))
+    try:
+        yield counts
+    finally:
+        for cls, name, original in originals:
+            setattr(cls, name, original)
+
+def chromium_rss_mb() -> float:
+    children = psutil.Process().children(recursive=True)
+    total = 0
+    for child in children:
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return round(total / 1024 / 1024, 1)
+
+def fast_pacer() -> AdaptivePacer:
+    # Replayed pages have nothing to be polite to
+    return AdaptivePacer(initial_rate=600, min_rate=600, max_rate=600, jitter=0)
+
+def result_row(name: str, size: int, tweets: int, seconds: float, round_trips: int, peak_python_mb: float, chromium_mb: float | None = None) -> dict:
+    return {
+        "benchmark": name,
+        "size": size,
+        "tweets": tweets,
+        "seconds": round(seconds, 4),
+        "tweets_per_sec": round(tweets / seconds, 1) if seconds else None,
+        "round_trips_per_tweet": round(round_trips / tweets, 2) if tweets else None,
+        "peak_python_mb": peak_python_mb,
+        "chromium_rss_mb": chromium_mb,
+    }
+
+async def bench_extract_articles(pool: BrowserPool, sizes: list[int]) -> list[dict]:
+    x_scraping = XScraping()
+    rows = []
+    for size in sizes:
+        for batched in (False, True):
+            async with pool.lease() as page:
+                # Render every article at once so both extractors see the same DOM
+                await page.set_content(build_synthetic_search_page(BENCH_TAG, size, per_scroll=size, dom_window=size))
+                entries = []
+                tracemalloc.start()
+                with count_round_trips() as counts:
+                    started = time.perf_counter()
+                    if batched:
+                        await x_scraping.extract_articles_batched(page, "benchmark", BENCH_TAG, set(), entries)
+                    else:
+                        articles = await page.query_selector_all("article")
+                        await x_scraping.extract_articles("benchmark", BENCH_TAG, 0, articles, set(), entries)
+                    seconds = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                name = "extract_articles_batched" if batched else "extract_articles"
+                rows.append(result_row(name, size, len(entries), seconds, sum(counts.values()), round(peak / 1024 / 1024, 2), chromium_rss_mb()))
+    return rows
+
+async def bench_scrape_all(pool: BrowserPool, replay: SnapshotReplay, sizes: list[int], per_scroll: int) -> list[dict]:
+    x_scraping = XScraping()
+    url = x_scraping.encode_tag_to_url({"benchmark": [BENCH_TAG]})["benchmark"][BENCH_TAG]
+    rows = []
+    for size in sizes:
+        replay.pages[BENCH_TAG] = build_synthetic_search_page(BENCH_TAG, size, per_scroll=per_scroll)
+        max_scrolls = size // per_scroll + 2
+        tracemalloc.start()
+        with count_round_trips() as counts:
+            started = time.perf_counter()
+            entries = await x_scraping.scrape_all_tweet_texts("benchmark", BENCH_TAG, url, max_scrolls=max_scrolls, pool=pool, pacer=fast_pacer())
+            seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append(result_row("scrape_all_tweet_texts", size, len(entries), seconds, sum(counts.values()), round(peak / 1024 / 1024, 2), chromium_rss_mb()))
+    return rows
+
+def synthetic_records(size: int) -> list[dict]:
+    base = datetime(2025, 5, 14, 12, 0, 0)
+    return [
+        {
+            "category": f"category_{i % 8}",
+            "tag": f"#tag{i % 25}",
+            "categories": [f"category_{i % 8}"],
+            "tags": [f"#tag{i % 25}"],
+            "tweetId": str(1922000000000000000 - i),
+            "username": f"@user_{i % 997}",
+            "tweetText": f"ข้อความทดสอบ {i} " + "lorem ipsum " * (i % 5),
+            "postTimeRaw": base - timedelta(minutes=i),
+            "scrapeTime": base.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        for i in range(size)
+    ]
+
+def bench_to_dataframe(sizes: list[int]) -> list[dict]:
+    rows = []
+    for size in sizes:
+        records = synthetic_records(size)
+        tracemalloc.start()
+        started = time.perf_counter()
+        data = XScraping.to_dataframe(records)
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append(result_row("to_dataframe", size, len(data), seconds, 0, round(peak / 1024 / 1024, 2)))
+
+        # Records appended into the columnar buffer as they arrive, never held as a dict list
+        del data
+        tracemalloc.start()
+        started = time.perf_counter()
+        columns = TweetColumns()
+        for start in range(0, size, 500):
+            columns.extend(records[start:start + 500])
+        table = columns.to_arrow()
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append(result_row("TweetColumns.to_arrow", size, table.num_rows, seconds, 0, round(peak / 1024 / 1024, 2)))
+    return rows
+
+async def run(extract_sizes: list[int], scrape_sizes: list[int], dataframe_sizes: list[int], per_scroll: int, snapshot_dir: str | None) -> list[dict]:
+    replay = SnapshotReplay.from_dir(snapshot_dir) if snapshot_dir else SnapshotReplay({})
+    rows = []
+    async with BrowserPool(size=1, storage_state=None, context_hook=replay.apply, max_navigations=1000) as pool:
+        rows += await bench_extract_articles(pool, extract_sizes)
+        if snapshot_dir:
+            x_scraping = XScraping()
+            for tag in list(replay.pages):
+                url = x_scraping.encode_tag_to_url({"replay": [tag]})["replay"][tag]
+                started = time.perf_counter()
+                with count_round_trips() as counts:
+                    entries = await x_scraping.scrape_all_tweet_texts("replay", tag, url, max_scrolls=1, pool=pool, pacer=fast_pacer())
+                rows.append(result_row(f"recorded:{tag}", 1, len(entries), time.perf_counter() - started, sum(counts.values()), 0.0, chromium_rss_mb()))
+        else:
+            rows += await bench_scrape_all(pool, replay, scrape_sizes, per_scroll)
+    rows += bench_to_dataframe(dataframe_sizes)
+    return rows
+
+def print_table(rows: list[dict]) -> None:
+    table = Table(title="XScraping offline benchmark")
+    for column in rows[0]:
+        table.add_column(column)
+    for row in rows:
+        table.add_row(*["-" if value is None else str(value) for value in row.values()])
+    Console().print(table)
+
+def parse_sizes(value: str) -> list[int]:
+    return [int(size) for size in value.split(",") if size]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark XScraping against replayed search pages (no live X traffic).")
+    parser.add_argument("--extract-sizes", type=parse_sizes, default=[20, 100, 500])
+    parser.add_argument("--scrape-sizes", type=parse_sizes, default=[100, 500])
+    parser.add_argument("--dataframe-sizes", type=parse_sizes, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--per-scroll", type=int, default=20)
+    parser.add_argument("--snapshots", default=None, help="Directory of HTML snapshots saved by replay.py instead of synthetic pages")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.extract_sizes, args.scrape_sizes, args.dataframe_sizes, args.per_scroll, args.snapshots))
+    print_table(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
@@ -0,0 +1,134 @@
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Import LakeFS loader
+from src.backend.load.lakefs_loader import LakeFSLoader, split_path
+# Import dedup key columns
+from src.backend.load.key_index import KEY_COLUMNS
+# Import parquet writer profiles
+from src.backend.load.parquet_profiles import WriterProfile, get_profile
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import path configuration
+from config.path_config import lakefs_s3_path
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+@dataclass
+class PartitionCompaction:
+    partition: str
+    files_before: int
+    files_after: int
+    rows: int
+    bytes_before: int
+    bytes_after: int
+
+class Compactor:
+    def __init__(self, loader: LakeFSLoader, lakefs_endpoint: str, lakefs_s3_path: str = lakefs_s3_path, min_age_days: int = 2, min_files: int = 2, profile: str | WriterProfile = "analytics"):
+        self.loader = loader
+        self.fs = loader.backend.filesystem(lakefs_endpoint)
+        self.lakefs_endpoint = lakefs_endpoint
+        self.lakefs_s3_path = lakefs_s3_path
+        self.repo_name, self.branch_name, self.dataset = split_path(lakefs_s3_path)
+        # Late tweets still land in the last day or two, so only older partitions count as closed
+        self.min_age_days = min_age_days
+        self.min_files = min_files
+        # Closed days are read far more than written, so they get the read-optimised layout
+        self.profile = get_profile(profile)
+
+    def _root(self, branch: str) -> str:
+        return f"{self.repo_name}/{branch}/{self.dataset}"
+
+    def partitions(self, branch: str | None = None) -> dict[str, list[str]]:
+        root = self._root(branch or self.branch_name)
+        self.fs.invalidate_cache(root)
+        files = {}
+        for path in self.fs.glob(f"{root}/year=*/month=*/day=*/*.parquet"):
+            partition = path[len(root) + 1:].rsplit("/", 1)[0]
+            files.setdefault(partition, []).append(path)
+        return files
+
+    def is_closed(self, partition: str, today: date) -> bool:
+        values = dict(part.split("=", 1) for part in partition.split("/"))
+        day = date(int(values["year"]), int(values["month"]), int(values["day"]))
+        return day <= today - timedelta(days=self.min_age_days)
+
+    def plan(self, today: date | None = None, branch: str | None = None) -> dict[str, list[str]]:
+        today = today or date.today()
+        return {
+            partition: files
+            for partition, files in sorted(self.partitions(branch).items())
+            if len(files) >= self.min_files and self.is_closed(partition, today)
+        }
+
+    def _read(self, path: str) -> pa.Table:
+        # partitioning=None: year/month/day stay in the directory names, not in the file
+        table = pq.read_table(path, filesystem=self.fs, partitioning=None)
+        # Older files hold plain strings, newer ones dictionaries; decode so every file concatenates
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+        return table
+
+    def compact_partition(self, run_path: str, partition: str, files: list[str]) -> PartitionCompaction:
+        tables = [self._read(path) for path in files]
+        table = self.profile.prepare_table(pa.concat_tables(tables, promote_options="permissive"))
+        target_dir = f"{self._root(split_path(run_path)[1])}/{partition}"
+        target = f"{target_dir}/compacted-{uuid.uuid4().hex}.parquet"
+        # lakeFS paths are identical on the run branch, only the branch segment differs
+        sources = [f"{target_dir}/{path.rsplit('/', 1)[-1]}" for path in files]
+        bytes_before = sum(self.fs.size(path) for path in sources)
+        with self.fs.open(target, "wb") as f:
+            pq.write_table(table, f, **self.profile.options())
+        self.fs.rm(sources)
+        # Two runs deleting the same files merge cleanly, which would keep both compacted copies;
+        # rewriting this marker (ignored by parquet readers, "_" prefix) makes them conflict instead
+        self.fs.pipe(f"{target_dir}/_compaction", target.rsplit("/", 1)[-1].encode())
+        return PartitionCompaction(partition, len(files), 1, table.num_rows, bytes_before, self.fs.size(target))
+
+    def read_seconds(self) -> float:
+        started = time.perf_counter()
+        self.fs.invalidate_cache(self._root(self.branch_name))
+        pq.read_table(self._root(self.branch_name), filesystem=self.fs)
+        return time.perf_counter() - started
+
+    def run(self, today: date | None = None) -> list[PartitionCompaction]:
+        plan = self.plan(today)
+        if not plan:
+            logger.info("No closed partitions with small files to compact.")
+            return []
+
+        def write(run_path: str) -> list[PartitionCompaction]:
+            # Planned again on the run branch: after a conflict it holds what the other run merged
+            results = []
+            for partition, files in self.plan(today, split_path(run_path)[1]).items():
+                result = self.compact_partition(run_path, partition, files)
+                logger.info(f"Compacted {partition}: {result.files_before} files -> 1 ({result.rows} rows, {result.bytes_before} -> {result.bytes_after} bytes)")
+                results.append(result)
+            return results
+
+        # Only tweet datasets have a partition tree; read one footer now, the planned files are gone after the merge
+        has_keys = set(KEY_COLUMNS).issubset(pq.read_schema(next(iter(plan.values()))[0], filesystem=self.fs).names)
+
+        # Rewritten on a run branch and merged, so readers of main never see a half-compacted day
+        results = self.loader.transact(
+            self.lakefs_s3_path,
+            write,
+            f"Compact {len(plan)} partition(s) of {self.dataset}",
+            {"partitions": str(len(plan)), "files_removed": str(sum(len(files) - 1 for files in plan.values()))},
+            prefix="compaction",
+        )
+        if not has_keys:
+            return results
+        # Days written before every load kept their tree get one now, so sync() can skip them
+        days = pd.DataFrame([
+            {name: int(value) for name, value in (part.split("=", 1) for part in result.partition.split("/"))}
+            for result in results
+        ])
+        self.loader.refresh_hash(days, self.lakefs_endpoint, lakefs_s3_path=self.lakefs_s3_path)
+        return results
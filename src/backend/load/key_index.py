@@ -0,0 +1,140 @@
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import path configuration
+from config.path_config import KEY_INDEX_DIR
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+KEY_COLUMNS = ["postTimeRaw", "username", "tweetText"]
+
+def hash_keys(df: pd.DataFrame, columns: list[str] = KEY_COLUMNS) -> np.ndarray:
+    # Normalise dtypes first so a batch (string/categorical, any datetime unit) hashes like the data read back from parquet
+    keys = pd.DataFrame({
+        column: (
+            pd.to_datetime(df[column]).astype("datetime64[ns]").astype("int64")
+            if column == "postTimeRaw"
+            else df[column].astype(object)
+        )
+        for column in columns
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy(dtype=np.uint64)
+
+def index_path_for(dataset_path: str) -> str:
+    # Sibling object, not inside the dataset directory, so parquet readers never see it
+    return f"{dataset_path.rstrip('/')}.keys.npy"
+
+class KeyIndex:
+    def __init__(self, fs, dataset_path: str, cache_dir: str | Path = KEY_INDEX_DIR):
+        self.fs = fs
+        self.dataset_path = dataset_path
+        self.path = index_path_for(dataset_path)
+        # Branch segment left out: run branches share main's cache, the ETag decides if it is still current
+        repo, _, key = dataset_path.split("://", 1)[-1].strip("/").split("/", 2)
+        slug = f"{repo}__{key.replace('/', '__')}"
+        self.cache_path = Path(cache_dir) / f"{slug}.npy"
+        self.meta_path = Path(cache_dir) / f"{slug}.json"
+        # Sorted, unique uint64 hashes of KEY_COLUMNS; 64 bits keeps collisions negligible at millions of rows
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.etag: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _remote_etag(self) -> str | None:
+        self.fs.invalidate_cache(self.path)
+        try:
+            # "" when the store exists but reports no ETag; such an index is never trusted from the local cache
+            return self.fs.info(self.path).get("ETag") or ""
+        except FileNotFoundError:
+            return None
+
+    def _read_cache(self) -> np.ndarray | None:
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if not self.etag or meta.get("etag") != self.etag:
+                return None
+            return np.load(self.cache_path)
+        except (OSError, ValueError, json.JSONDecodeError):
+            return None
+
+    def _write_cache(self) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        for target, write in (
+            (self.cache_path, lambda f: np.save(f, self.keys)),
+            (self.meta_path, lambda f: f.write(json.dumps({"etag": self.etag, "keys": len(self.keys)}).encode())),
+        ):
+            fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=".key-index-", suffix=target.suffix)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    write(f)
+                os.replace(tmp_path, target)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    def load(self) -> "KeyIndex":
+        self.etag = self._remote_etag()
+        if self.etag is None:
+            if self.fs.exists(self.dataset_path):
+                self.rebuild()
+            else:
+                self.keys = np.empty(0, dtype=np.uint64)
+            return self
+
+        cached = self._read_cache()
+        if cached is not None:
+            self.keys = cached
+            logger.debug(f"Key index for {self.dataset_path} from local cache: {len(self.keys)} keys")
+            return self
+
+        with self.fs.open(self.path, "rb") as f:
+            self.keys = np.load(io.BytesIO(f.read()))
+        self._write_cache()
+        logger.info(f"Downloaded key index for {self.dataset_path}: {len(self.keys)} keys")
+        return self
+
+    def rebuild(self) -> None:
+        # One-off full scan of the key columns when the dataset predates the index
+        logger.info(f"Building key index from a full scan of {self.dataset_path}")
+        existing = pd.read_parquet(self.fs._strip_protocol(self.dataset_path), columns=KEY_COLUMNS, filesystem=self.fs, engine="pyarrow")
+        self.keys = np.unique(hash_keys(existing))
+        self.save()
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        if len(self.keys) == 0:
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.searchsorted(self.keys, hashes)
+        positions[positions == len(self.keys)] = 0
+        return self.keys[positions] == hashes
+
+    def new_rows(self, df: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+        # Rows whose key is neither in the index nor earlier in the same batch
+        hashes = hash_keys(df)
+        mask = ~self.contains(hashes) & ~pd.Series(hashes).duplicated().to_numpy()
+        return df[mask], hashes[mask]
+
+    def add(self, hashes: np.ndarray) -> None:
+        self.keys = np.union1d(self.keys, hashes.astype(np.uint64))
+
+    def remove(self, hashes: np.ndarray) -> None:
+        # For rows dropped by a partition rewrite; postTimeRaw is part of the key, so a key lives in one day only
+        self.keys = np.setdiff1d(self.keys, hashes.astype(np.uint64), assume_unique=True)
+
+    def save(self) -> None:
+        buffer = io.BytesIO()
+        np.save(buffer, self.keys)
+        # A single PUT, so readers see either the old or the new index
+        self.fs.pipe(self.path, buffer.getvalue())
+        self.etag = self._remote_etag()
+        self._write_cache()
+        logger.debug(f"Saved key index {self.path}: {len(self.keys)} keys")
@@ -1,4 +1,3 @@
-from lakefs.client import Client
 import lakefs
 from lakefs import repositories
 import subprocess
@@ -6,78 +5,159 @@ import pandas as pd
 from dotenv import load_dotenv
 import os
 import shutil
-import hashlib
-import fsspec
+import numpy as np
+import pyarrow.dataset as ds
+from pathlib import Path
 
 # Import modern log configuration
 from config.logging.modern_log import LoggingConfig
 # Import path configuration
-from config.path_config import lakefs_s3_path, repo_name, branch_name, lakefs_s3_path_hash, repo_name_hash
+from config.path_config import lakefs_s3_path, repo_name, branch_name, lakefs_s3_path_hash, repo_name_hash, KEY_INDEX_DIR
+# Import storage backends (lakeFS or a local stand-in)
+from src.backend.load.storage import LakeFSBackend, LocalBackend
+# Import dedup key index
+from src.backend.load.key_index import KEY_COLUMNS, KeyIndex, hash_keys
+# Import parquet writer profiles
+from src.backend.load.parquet_profiles import TWEET_SCHEMA, WriterProfile, get_profile
+# Import per-partition hash trees
+from src.backend.load.partition_hash import changed_partitions, merge_trees, partition_tree, read_tree, write_tree
 
 logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger(__name__)
 
 load_dotenv()
 
 import time  # <-- เพิ่มสำหรับ sleep
+import random
+import uuid
+from lakefs.exceptions import ConflictException
+
+def split_path(lakefs_s3_path: str) -> tuple[str, str, str]:
+    # s3://<repo>/<ref>/<key> -> (repo, ref, key)
+    repo, ref, key = lakefs_s3_path.split("://", 1)[1].split("/", 2)
+    return repo, ref, key
+
+def on_ref(lakefs_s3_path: str, ref: str) -> str:
+    # Same object on another branch or commit; the lakeFS S3 gateway takes either as the second segment
+    repo, _, key = split_path(lakefs_s3_path)
+    return f"s3://{repo}/{ref}/{key}"
+
+def partition_filters(data: pd.DataFrame) -> list[list[tuple]] | None:
+    # One (year, month, day) conjunction per day in the batch, for pyarrow partition pruning
+    if {"year", "month", "day"}.issubset(data.columns):
+        days = data[["year", "month", "day"]]
+    elif "postTimeRaw" in data.columns:
+        post_time = pd.to_datetime(data["postTimeRaw"], errors="coerce").dropna()
+        days = pd.DataFrame({"year": post_time.dt.year, "month": post_time.dt.month, "day": post_time.dt.day})
+    else:
+        return None
+    days = days.dropna().drop_duplicates()
+    if days.empty:
+        return None
+    return [
+        [("year", "=", int(year)), ("month", "=", int(month)), ("day", "=", int(day))]
+        for year, month, day in days.itertuples(index=False)
+    ]
 
 class LakeFSLoader:
-    def __init__(self, host: str = "http://localhost:8001"):
-        self.restart_container()
-        self.client = Client(
-            host=host,
-            username=os.getenv("ACCESS_KEY"),  
-            password=os.getenv("SECRET_KEY"),
-            verify_ssl=False,
-        )
-        logger.debug(f"Connected to lakeFS version: {self.client.version}")
+    def __init__(self, host: str = "http://localhost:8001", ready_timeout: float = 60.0, profile: str | WriterProfile = "ingest", backend: LakeFSBackend | LocalBackend | None = None, key_index_dir: str | Path = KEY_INDEX_DIR):
+        # Codec, row groups, sort order and dictionary columns for every parquet write
+        self.profile = get_profile(profile)
+        # Local cache of the key indexes; benchmarks and tests point it at a scratch directory
+        self.key_index_dir = key_index_dir
+        # Repositories, branches and commits; LocalBackend runs the same code without a lakeFS server
+        self.backend = backend or LakeFSBackend(host)
+        self.host = self.backend.host
+        self.client = self.backend.client
+        self.wait_until_ready(timeout=ready_timeout)
+
+    def wait_until_ready(self, timeout: float = 60.0, **kwargs) -> None:
+        self.backend.wait_until_ready(timeout=timeout, **kwargs)
+
+    def ensure_repository(self, repo_name: str) -> None:
+        self.backend.ensure_repository(repo_name)
 
-    def load_hash(self, df: pd.DataFrame, lakefs_endpoint: str, repo_name: str = repo_name_hash):
+    def _io(self, lakefs_endpoint: str, lakefs_s3_path: str):
+        # (filesystem, path) for pandas/pyarrow: the backend's filesystem and the path without its scheme
+        fs = self.backend.filesystem(lakefs_endpoint)
+        return fs, fs._strip_protocol(lakefs_s3_path)
+
+    def hash_tree_path(self, lakefs_s3_path: str = lakefs_s3_path) -> str:
+        # One Merkle tree per dataset in the hash repo
+        return f"{lakefs_s3_path_hash}/{lakefs_s3_path.rstrip('/').rsplit('/', 1)[-1]}.json"
+
+    def load_hash(self, df: pd.DataFrame, lakefs_endpoint: str, repo_name: str = repo_name_hash, lakefs_s3_path: str = lakefs_s3_path) -> dict:
         logger.info(f"Creating or replacing repository hash: {repo_name}")
-        lakefs.repository(repo_name, client=self.client).create(storage_namespace=f"local://{repo_name}")
+        self.ensure_repository(repo_name)
         logger.info(f"Repository {repo_name} hash created or already exists.")
 
-        storage_options = {
-            "key": os.getenv("ACCESS_KEY"),
-            "secret": os.getenv("SECRET_KEY"),
-            "client_kwargs": {
-                "endpoint_url": lakefs_endpoint
-            }
-        }
-        columns = ["postTimeRaw", "username", "tweetText"]
-        data_str = df[columns].astype(str).apply(lambda row: "_".join(row), axis=1).str.cat()
-        hash_text = hashlib.md5(data_str.encode()).hexdigest()
-        fs = fsspec.filesystem("s3", **storage_options)
-        with fs.open(lakefs_s3_path_hash, "w") as f:
-            f.write(hash_text)   
-        logger.info(f"Uploaded hash: {hash_text} to {lakefs_s3_path_hash}")
-
-    def check_hash(self, df: pd.DataFrame, lakefs_endpoint: str) -> bool:
-        storage_options = {
-            "key": os.getenv("ACCESS_KEY"),
-            "secret": os.getenv("SECRET_KEY"),
-            "client_kwargs": {
-                "endpoint_url": lakefs_endpoint
-            }
-        }
-        columns = ["postTimeRaw", "username", "tweetText"]
-        data_str = df[columns].astype(str).apply(lambda row: "_".join(row), axis=1).str.cat()
-        new_hash = hashlib.md5(data_str.encode()).hexdigest()
-
-        fs = fsspec.filesystem("s3", **storage_options)
-
-        if fs.exists(lakefs_s3_path_hash):
-            with fs.open(lakefs_s3_path_hash, "r") as f:
-                existing_hash = f.read().strip()
-            if new_hash == existing_hash:
-                logger.info("No changes detected. Hash matched.")
-                return False 
-
-        with fs.open(lakefs_s3_path_hash, "w") as f:
-            f.write(new_hash)
-        logger.info(f"Uploaded new hash: {new_hash} to {lakefs_s3_path_hash}")
-        return True  
-    
+        new_tree = partition_tree(df)
+        return self._update_hash_tree(lambda: new_tree, lakefs_endpoint, lakefs_s3_path)
+
+    def refresh_hash(self, data: pd.DataFrame, lakefs_endpoint: str, lakefs_s3_path: str = lakefs_s3_path) -> dict | None:
+        # Recompute the tree of every day data was written to from what that day now stores, so late
+        # tweets landing in old days don't leave check_hash/sync comparing against a stale tree
+        filters = partition_filters(data)
+        if filters is None:
+            return None
+        self.ensure_repository(repo_name_hash)
+
+        def stored_tree() -> dict:
+            # Read inside the hash transaction, so a retry after a conflict also sees rows merged since
+            return partition_tree(self.read(lakefs_endpoint, lakefs_s3_path, columns=[*KEY_COLUMNS, "year", "month", "day"], filters=filters))
+
+        return self._update_hash_tree(stored_tree, lakefs_endpoint, lakefs_s3_path)
+
+    def _update_hash_tree(self, new_tree, lakefs_endpoint: str, lakefs_s3_path: str) -> dict:
+        fs = self.backend.filesystem(lakefs_endpoint)
+
+        def write(hash_path: str) -> dict:
+            # Merged against the run branch's copy, so a retry after a conflict sees the other run's tree
+            tree = merge_trees(read_tree(fs, hash_path), new_tree())
+            write_tree(fs, hash_path, tree)
+            return tree
+
+        tree = self.transact(self.hash_tree_path(lakefs_s3_path), write, "Update hash tree", prefix="hash")
+        logger.info(f"Uploaded hash tree {tree['root']} ({len(tree['partitions'])} partitions) to {self.hash_tree_path(lakefs_s3_path)}")
+        return tree
+
+    def changed_partitions(self, df: pd.DataFrame, lakefs_endpoint: str, lakefs_s3_path: str = lakefs_s3_path) -> list[str]:
+        stored = read_tree(self.backend.filesystem(lakefs_endpoint), self.hash_tree_path(lakefs_s3_path))
+        return changed_partitions(partition_tree(df), stored)
+
+    def check_hash(self, df: pd.DataFrame, lakefs_endpoint: str, lakefs_s3_path: str = lakefs_s3_path) -> list[str]:
+        # Empty (falsy) when every day in df matches the stored tree
+        changed = self.changed_partitions(df, lakefs_endpoint, lakefs_s3_path)
+        if not changed:
+            logger.info("No changes detected. Hash matched.")
+            return changed
+        logger.info(f"Changed partitions: {changed}")
+        self.load_hash(df, lakefs_endpoint, lakefs_s3_path=lakefs_s3_path)
+        return changed
+
+    def sync(self, df: pd.DataFrame, lakefs_endpoint: str, lakefs_s3_path: str = lakefs_s3_path) -> list[str]:
+        # df holds the full contents of each day it covers; only days whose hash changed are rewritten
+        changed = self.changed_partitions(df, lakefs_endpoint, lakefs_s3_path)
+        if not changed:
+            logger.info(f"All {df[['year', 'month', 'day']].drop_duplicates().shape[0]} partition(s) unchanged, nothing rewritten.")
+            return changed
+        keys = "year=" + df["year"].astype(str) + "/month=" + df["month"].astype(str) + "/day=" + df["day"].astype(str)
+        rewrite = df[keys.isin(changed).to_numpy()]
+        hashes = np.unique(hash_keys(rewrite))
+
+        def write(run_path: str) -> None:
+            index = self.key_index(lakefs_endpoint, run_path)
+            # Rows the rewrite drops must leave the index too, or incremental loads would keep skipping them
+            stored = self.read(lakefs_endpoint, run_path, columns=KEY_COLUMNS, filters=partition_filters(rewrite))
+            index.remove(np.unique(hash_keys(stored)))
+            self._write_with_index(rewrite, lakefs_endpoint, run_path, index, hashes, existing_data_behavior="delete_matching")
+
+        self.transact(lakefs_s3_path, write, f"Rewrite {len(changed)} changed partition(s)", {"partitions": ",".join(changed)}, prefix="sync")
+        self.load_hash(df, lakefs_endpoint, lakefs_s3_path=lakefs_s3_path)
+        logger.info(f"Rewrote {len(changed)} changed partition(s) with {len(rewrite)} records in {lakefs_s3_path}")
+        return changed
+
     def restart_container(self, container_name="lakefs_db"):
+        # Manual recovery only; loaders wait for readiness instead of calling this
         try:
             stop_command = ["docker", "compose", "down", container_name]
             logger.info(f"Stopping container: {' '.join(stop_command)}")
@@ -111,81 +191,143 @@ class LakeFSLoader:
         except Exception as e:
             logger.error("Error connecting to lakeFS", exc_info=True)
 
+    def key_index(self, lakefs_endpoint: str, lakefs_s3_path: str = lakefs_s3_path) -> KeyIndex:
+        return KeyIndex(self.backend.filesystem(lakefs_endpoint), lakefs_s3_path, cache_dir=self.key_index_dir).load()
+
+    def head_commit(self, lakefs_s3_path: str = lakefs_s3_path) -> str:
+        # Pin reads to this id (see read) for a consistent, cacheable view of the branch
+        repo, branch = split_path(lakefs_s3_path)[:2]
+        return self.backend.head_commit(repo, branch)
+
+    def read(self, lakefs_endpoint: str, lakefs_s3_path: str = lakefs_s3_path, ref: str | None = None, **kwargs) -> pd.DataFrame:
+        fs, path = self._io(lakefs_endpoint, on_ref(lakefs_s3_path, ref) if ref else lakefs_s3_path)
+        # Tweet datasets mix partitions from before and after tags/categories/tweetId; read them all with the full schema
+        if "schema" not in kwargs and set(KEY_COLUMNS).issubset(ds.dataset(path, filesystem=fs, format="parquet", partitioning="hive").schema.names):
+            kwargs["schema"] = TWEET_SCHEMA
+        return pd.read_parquet(path, filesystem=fs, engine='pyarrow', **kwargs)
+
+    def _commit_staged(self, repo_id: str, branch: str) -> None:
+        # Run branches start from the last commit, so anything only staged on the target would be invisible to them
+        if self.backend.has_uncommitted(repo_id, branch):
+            self.backend.commit(repo_id, branch, "Commit staged changes before branch run")
+
+    def transact(self, lakefs_s3_path: str, write, message: str, metadata: dict | None = None, prefix: str = "load", max_attempts: int = 4, initial_delay: float = 1.0):
+        # Run write(run_path) on a short-lived branch off the target, commit there and merge back.
+        # A merge conflict (another run touched the same object, e.g. the key index) discards the
+        # branch and reruns write on a fresh one, so it re-reads what the other run merged.
+        repo_id, target_id, _ = split_path(lakefs_s3_path)
+        self._commit_staged(repo_id, target_id)
+        delay = initial_delay
+        for attempt in range(1, max_attempts + 1):
+            run_id = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            self.backend.create_branch(repo_id, run_id, source=target_id)
+            try:
+                result = write(on_ref(lakefs_s3_path, run_id))
+                if not self.backend.has_uncommitted(repo_id, run_id):
+                    return result
+                self.backend.commit(repo_id, run_id, message, {**(metadata or {}), "run": run_id})
+                reference = self.backend.merge(repo_id, run_id, target_id)
+                logger.debug(f"Merged {run_id} into {repo_id}/{target_id} at {reference}")
+                return result
+            except ConflictException as e:
+                if attempt == max_attempts:
+                    raise
+                logger.warning(f"Merge of {run_id} into {repo_id}/{target_id} conflicted (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay + random.uniform(0, delay))
+                delay *= 2
+            finally:
+                # A leftover run branch is only clutter; failing here would mask the write's error or undo a merged run
+                try:
+                    self.backend.delete_branch(repo_id, run_id)
+                except Exception as e:
+                    logger.warning(f"Could not delete run branch {repo_id}/{run_id}: {e}")
+
+    def _write_with_index(self, data: pd.DataFrame, lakefs_endpoint: str, lakefs_s3_path: str, index: KeyIndex | None, hashes: np.ndarray | None, **parquet_options) -> None:
+        fs, path = self._io(lakefs_endpoint, lakefs_s3_path)
+        self.profile.prepare(data).to_parquet(
+            path,
+            filesystem=fs,
+            partition_cols=['year', 'month', 'day'],
+            engine='pyarrow',
+            **{**self.profile.options(), **parquet_options},
+        )
+        # Same run branch and commit as the data, so the two can't diverge
+        if index is not None:
+            index.add(hashes)
+            index.save()
+
     def load(self, data: pd.DataFrame, lakefs_endpoint: str, repo_name: str = repo_name, lakefs_s3_path: str = lakefs_s3_path) -> None:
         logger.info(f"Creating or replacing repository: {repo_name}")
-        lakefs.repository(repo_name, client=self.client).create(storage_namespace=f"local://{repo_name}")
+        # Micro-batches call load() repeatedly within one run
+        self.ensure_repository(repo_name)
         logger.info(f"Repository {repo_name} created or already exists.")
 
         logger.debug(f"Uploading data to lakeFS repository: {repo_name} on branch: {branch_name}")
 
-        storage_options = {
-            "key": os.getenv("ACCESS_KEY"),
-            "secret": os.getenv("SECRET_KEY"),
-            "client_kwargs": {
-                "endpoint_url": lakefs_endpoint
-            }
-        }
-        
-        data.to_parquet(
-            lakefs_s3_path,
-            storage_options=storage_options,
-            partition_cols=['year', 'month', 'day'],
-            engine='pyarrow',
-        )
+        # Datasets without the tweet key columns (e.g. wordcloud output) carry no index
+        has_keys = set(KEY_COLUMNS).issubset(data.columns)
+        hashes = np.unique(hash_keys(data)) if has_keys else None
 
-        valid_data = pd.read_parquet(
-            lakefs_s3_path,
-            storage_options=storage_options,
-            engine='pyarrow',
-        )
-        logger.info(f"Data uploaded successfully to {lakefs_s3_path} with {len(valid_data)} records.")
-
-    def incremental_load(self, data: pd.DataFrame, lakefs_endpoint: str, lakefs_s3_path: str = lakefs_s3_path, is_wordcloud: bool=False) -> None:
-        storage_options = {
-            "key": os.getenv("ACCESS_KEY"),
-            "secret": os.getenv("SECRET_KEY"),
-            "client_kwargs": {
-                "endpoint_url": lakefs_endpoint
-            }
-        }
-        data_in_lakefs = pd.read_parquet(
-            lakefs_s3_path,
-            storage_options=storage_options,
-            engine='pyarrow',
-        )
-        if is_wordcloud:
-            new_unique_data = data.merge(
-                data_in_lakefs,
-                on=["postTimeRaw", "tweetText"],    
-                how="left",
-                indicator=True
-            ).query('_merge == "left_only"').drop(columns=['_merge'])
-        else:
-            new_unique_data = data.merge(
-                data_in_lakefs,
-                on=["postTimeRaw", "username", "tweetText"],    
-                how="left",
-                indicator=True
-            ).query('_merge == "left_only"').drop(columns=['_merge'])
-
-        cols = [col for col in new_unique_data.columns if not col.endswith('_y')]
-        new_cleaned_df = new_unique_data[cols].copy()
-        new_cleaned_df.columns = [col.replace('_x', '') for col in new_cleaned_df.columns]
-
-        if len(new_cleaned_df) > 0:
-            logger.info(new_cleaned_df)
-            logger.info(f"Number of new records: {len(new_cleaned_df)}")
-            new_cleaned_df.to_parquet(
-                lakefs_s3_path,
-                storage_options=storage_options,
-                partition_cols=['year', 'month', 'day'],
-                engine='pyarrow',
-            )
-
-            logger.info(f"Data uploaded successfully to {lakefs_s3_path} with {len(new_cleaned_df)} records.")
+        def write(run_path: str) -> KeyIndex | None:
+            index = self.key_index(lakefs_endpoint, run_path) if has_keys else None
+            self._write_with_index(data, lakefs_endpoint, run_path, index, hashes)
+            return index
+
+        index = self.transact(lakefs_s3_path, write, f"Load {len(data)} records", {"rows": str(len(data))})
+        total = f" ({len(index)} keys indexed)" if index is not None else ""
+        logger.info(f"Data uploaded successfully to {lakefs_s3_path} with {len(data)} records{total}.")
+        if has_keys:
+            self.refresh_hash(data, lakefs_endpoint, lakefs_s3_path)
+
+    def incremental_load(self, data: pd.DataFrame, lakefs_endpoint: str, lakefs_s3_path: str = lakefs_s3_path, is_wordcloud: bool=False, use_index: bool = True, full_scan: bool = False) -> None:
+        # The first spooled batch of a fresh deployment arrives here, before any load() created the repo
+        self.ensure_repository(split_path(lakefs_s3_path)[0])
+
+        def write(run_path: str) -> pd.DataFrame:
+            # Dedup runs against the run branch, i.e. main as of this attempt
+            if is_wordcloud:
+                # Wordcloud output has no tweet keys, so it is the only dataset written without an index
+                new_cleaned_df = self._anti_join(data, lakefs_endpoint, run_path, on=["postTimeRaw", "tweetText"], full_scan=full_scan)
+                index, hashes = None, None
+            elif not use_index:
+                # Dedup against the stored rows, but still index what is written so later index-based loads skip it
+                new_cleaned_df = self._anti_join(data, lakefs_endpoint, run_path, on=KEY_COLUMNS, full_scan=full_scan)
+                index = self.key_index(lakefs_endpoint, run_path)
+                hashes = np.unique(hash_keys(new_cleaned_df))
+            else:
+                # Probe the key index in memory instead of reading every stored row
+                index = self.key_index(lakefs_endpoint, run_path)
+                new_cleaned_df, hashes = index.new_rows(data)
+            if len(new_cleaned_df) > 0:
+                logger.info(new_cleaned_df)
+                logger.info(f"Number of new records: {len(new_cleaned_df)}")
+                self._write_with_index(new_cleaned_df, lakefs_endpoint, run_path, index, hashes)
+            return new_cleaned_df
+
+        written = self.transact(lakefs_s3_path, write, "Incremental load", prefix="incremental")
+        if len(written):
+            logger.info(f"Data uploaded successfully to {lakefs_s3_path} with {len(written)} records.")
+            if not is_wordcloud:
+                self.refresh_hash(written, lakefs_endpoint, lakefs_s3_path)
         else:
             logger.info("No new records found.")
 
+    def _anti_join(self, data: pd.DataFrame, lakefs_endpoint: str, lakefs_s3_path: str, on: list[str], full_scan: bool = False) -> pd.DataFrame:
+        filters = None if full_scan else partition_filters(data)
+        if filters is None:
+            logger.info(f"Comparing against a full scan of {lakefs_s3_path}")
+        else:
+            logger.info(f"Comparing against {len(filters)} partition(s) of {lakefs_s3_path}")
+        # Only the key columns are needed to find new rows
+        data_in_lakefs = self.read(lakefs_endpoint, lakefs_s3_path, columns=on, filters=filters)
+        new_unique_data = data.merge(
+            data_in_lakefs.drop_duplicates(),
+            on=on,
+            how="left",
+            indicator=True
+        ).query('_merge == "left_only"').drop(columns=['_merge'])
+        return new_unique_data
+
 if __name__ == "__main__":
     loader = LakeFSLoader(host="http://lakefs_db:8000")
     loader.connect()
\ No newline at end of file
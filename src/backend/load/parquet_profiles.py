@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+import pandas as pd
+import pyarrow as pa
+
+@dataclass(frozen=True)
+class WriterProfile:
+    name: str
+    compression: str
+    compression_level: int | None
+    # Rows per row group; None keeps pyarrow's default
+    row_group_size: int | None
+    sort_by: tuple[str, ...]
+    # Low-cardinality columns; free text is left plain, a dictionary there only costs memory
+    dictionary_columns: tuple[str, ...]
+    # Column index with per-page min/max, so filtered reads can skip pages, not just row groups
+    page_index: bool
+
+    def options(self) -> dict:
+        # Keyword arguments for DataFrame.to_parquet and pyarrow.parquet.write_table
+        options = {
+            "compression": self.compression,
+            "use_dictionary": list(self.dictionary_columns),
+            "write_statistics": True,
+            "write_page_index": self.page_index,
+        }
+        if self.compression_level is not None:
+            options["compression_level"] = self.compression_level
+        if self.row_group_size is not None:
+            options["row_group_size"] = self.row_group_size
+        return options
+
+    def prepare(self, data: pd.DataFrame) -> pd.DataFrame:
+        columns = [column for column in self.sort_by if column in data.columns]
+        return data.sort_values(columns, kind="stable", ignore_index=True) if columns else data
+
+    def prepare_table(self, table: pa.Table) -> pa.Table:
+        columns = [column for column in self.sort_by if column in table.column_names]
+        return table.sort_by([(column, "ascending") for column in columns]) if columns else table
+
+PROFILES = {
+    # Every micro-batch: cheap to write, still dictionary-encoded and with statistics
+    "ingest": WriterProfile(
+        name="ingest",
+        compression="snappy",
+        compression_level=None,
+        row_group_size=None,
+        sort_by=(),
+        dictionary_columns=("category", "tag", "username"),
+        page_index=False,
+    ),
+    # Compacted, read-mostly partitions: smaller files and time-sorted pages for range filters
+    "analytics": WriterProfile(
+        name="analytics",
+        compression="zstd",
+        compression_level=6,
+        row_group_size=128 * 1024,
+        sort_by=("postTimeRaw",),
+        dictionary_columns=("category", "tag", "username"),
+        page_index=True,
+    ),
+}
+
+# Every column the tweets dataset has ever had. pyarrow takes a dataset's schema from the first file
+# it finds, so partitions written before tags/categories/tweetId would otherwise hide those columns.
+TWEET_SCHEMA = pa.schema([
+    ("category", pa.dictionary(pa.int32(), pa.string())),
+    ("tag", pa.dictionary(pa.int32(), pa.string())),
+    ("categories", pa.list_(pa.string())),
+    ("tags", pa.list_(pa.string())),
+    ("tweetId", pa.string()),
+    ("username", pa.string()),
+    ("tweetText", pa.string()),
+    ("postTimeRaw", pa.timestamp("ns")),
+    ("scrapeTime", pa.timestamp("ns")),
+    ("year", pa.int32()),
+    ("month", pa.int32()),
+    ("day", pa.int32()),
+])
+
+def get_profile(profile: str | WriterProfile) -> WriterProfile:
+    if isinstance(profile, WriterProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown parquet writer profile {profile!r}, expected one of {sorted(PROFILES)}") from None
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+
+# Import dedup key hashing
+from src.backend.load.key_index import KEY_COLUMNS, hash_keys
+
+# Rows per Merkle leaf; a changed row only changes its leaf, its partition root and the tree root
+LEAF_ROWS = 4096
+
+def _digest(*parts: bytes) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part)
+    return h.hexdigest()
+
+def partition_key(year: int, month: int, day: int) -> str:
+    # Same layout as the hive directories written with partition_cols
+    return f"year={year}/month={month}/day={day}"
+
+def _day_numbers(df: pd.DataFrame) -> np.ndarray:
+    if {"year", "month", "day"}.issubset(df.columns):
+        year, month, day = (df[column].to_numpy(dtype=np.int64) for column in ("year", "month", "day"))
+    else:
+        post_time = pd.DatetimeIndex(pd.to_datetime(df["postTimeRaw"]))
+        year, month, day = (np.asarray(values, dtype=np.int64) for values in (post_time.year, post_time.month, post_time.day))
+    return year * 10_000 + month * 100 + day
+
+def partition_tree(df: pd.DataFrame, columns: list[str] = KEY_COLUMNS, leaf_rows: int = LEAF_ROWS) -> dict:
+    # Row hashes are vectorised and sorted, so the tree depends on content, not row order
+    hashes = hash_keys(df, columns)
+    days = _day_numbers(df)
+    order = np.lexsort((hashes, days))
+    hashes, days = hashes[order], days[order]
+    boundaries = np.flatnonzero(np.diff(days)) + 1
+    partitions = {}
+    for day_hashes, day in zip(np.split(hashes, boundaries), days[np.r_[0, boundaries]] if len(days) else []):
+        leaves = [_digest(day_hashes[start:start + leaf_rows].tobytes()) for start in range(0, len(day_hashes), leaf_rows)]
+        partitions[partition_key(day // 10_000, day // 100 % 100, day % 100)] = {
+            "root": _digest(*(leaf.encode() for leaf in leaves)),
+            "rows": int(len(day_hashes)),
+            "leaves": leaves,
+        }
+    return {"root": tree_root(partitions), "columns": list(columns), "partitions": partitions}
+
+def tree_root(partitions: dict) -> str:
+    return _digest(*(f"{key}:{node['root']}".encode() for key, node in sorted(partitions.items())))
+
+def merge_trees(old_tree: dict | None, new_tree: dict) -> dict:
+    # The new tree is authoritative for the days it covers; other days keep their stored nodes
+    partitions = {**(old_tree or {}).get("partitions", {}), **new_tree["partitions"]}
+    return {"root": tree_root(partitions), "columns": new_tree["columns"], "partitions": partitions}
+
+def changed_partitions(new_tree: dict, old_tree: dict | None) -> list[str]:
+    if old_tree is None:
+        return sorted(new_tree["partitions"])
+    old_partitions = old_tree.get("partitions", {})
+    return sorted(
+        key for key, node in new_tree["partitions"].items()
+        if old_partitions.get(key, {}).get("root") != node["root"]
+    )
+
+def read_tree(fs, path: str) -> dict | None:
+    try:
+        with fs.open(path, "rb") as f:
+            return json.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+def write_tree(fs, path: str, tree: dict) -> None:
+    fs.pipe(path, json.dumps(tree, indent=1).encode())
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+import pandas as pd
+
+# Import LakeFS loader
+from src.backend.load.lakefs_loader import LakeFSLoader
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import path configuration
+from config.path_config import SPOOL_DIR
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+class LoadSpool:
+    def __init__(self, directory: str | Path = SPOOL_DIR):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / "manifest.json"
+        # Sink handlers write from worker threads while the uploader updates from the event loop
+        self._lock = threading.Lock()
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            # The parquet files are the source of truth; pending() re-adopts them
+            logger.error(f"Could not read spool manifest {self.manifest_path}: {e}")
+            return {}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".manifest-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.manifest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _path(self, entry_id: str) -> Path:
+        return self.directory / f"{entry_id}.parquet"
+
+    def write(self, data: pd.DataFrame, mode: str = "incremental") -> str:
+        # Local and fsynced before returning, so the batch survives a crash or a lakeFS outage
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".batch-", suffix=".parquet")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                data.to_parquet(f, engine="pyarrow", index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path(entry_id))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            manifest = self._read_manifest()
+            manifest[entry_id] = {"mode": mode, "rows": len(data), "attempts": 0, "created": time.time(), "last_error": None}
+            self._write_manifest(manifest)
+        logger.debug(f"Spooled {len(data)} rows as {entry_id}")
+        return entry_id
+
+    def pending(self) -> dict[str, dict]:
+        # Oldest first; files without an entry (crash between the two writes) are adopted as incremental loads
+        with self._lock:
+            manifest = self._read_manifest()
+            # Dot-files are writes still in progress
+            files = {path.stem for path in self.directory.glob("[!.]*.parquet")} if self.directory.exists() else set()
+            for entry_id in files - manifest.keys():
+                manifest[entry_id] = {"mode": "incremental", "rows": None, "attempts": 0, "created": time.time(), "last_error": None}
+            entries = {entry_id: manifest[entry_id] for entry_id in sorted(files)}
+            if entries != manifest:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._write_manifest(entries)
+        return entries
+
+    def read(self, entry_id: str) -> pd.DataFrame:
+        return pd.read_parquet(self._path(entry_id), engine="pyarrow")
+
+    def mark_uploaded(self, entry_id: str) -> None:
+        # Removed only after lakeFS accepted it: a crash in between uploads the batch again (at least once)
+        with self._lock:
+            manifest = self._read_manifest()
+            manifest.pop(entry_id, None)
+            self._write_manifest(manifest)
+            self._path(entry_id).unlink(missing_ok=True)
+
+    def mark_failed(self, entry_id: str, error: str) -> int:
+        with self._lock:
+            manifest = self._read_manifest()
+            entry = manifest.setdefault(entry_id, {"mode": "incremental", "rows": None, "attempts": 0, "created": time.time()})
+            entry["attempts"] += 1
+            entry["last_error"] = error
+            self._write_manifest(manifest)
+            return entry["attempts"]
+
+def lakefs_upload(lakefs_endpoint: str) -> Callable[[pd.DataFrame, str], None]:
+    def upload(data: pd.DataFrame, mode: str) -> None:
+        # Built per upload: the readiness check is cached and fails fast while lakeFS is down
+        loader = LakeFSLoader(host=lakefs_endpoint, ready_timeout=10)
+        if mode == "load":
+            loader.load(data=data, lakefs_endpoint=lakefs_endpoint)
+        else:
+            loader.incremental_load(data=data, lakefs_endpoint=lakefs_endpoint)
+    return upload
+
+class SpoolUploader:
+    def __init__(
+        self,
+        spool: LoadSpool,
+        upload: Callable[[pd.DataFrame, str], None],
+        concurrency: int = 2,
+        poll_interval: float = 1.0,
+        initial_delay: float = 2.0,
+        max_delay: float = 300.0,
+        drain_timeout: float | None = 300.0,
+        on_uploaded: Callable[[pd.DataFrame, str], None] | None = None,
+    ):
+        # upload(data, mode) is blocking (pandas, lakeFS) and runs in a worker thread
+        self.spool = spool
+        self.upload = upload
+        # Called once lakeFS accepted a batch (e.g. to advance watermarks); one at a time, in a worker thread
+        self.on_uploaded = on_uploaded
+        self._on_uploaded_lock = asyncio.Lock()
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        # How long close() keeps uploading; whatever is left stays spooled for the next run
+        self.drain_timeout = drain_timeout
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._retry_at: dict[str, float] = {}
+        self._runner: asyncio.Task | None = None
+        self._closing = False
+
+        self.uploaded = 0
+        self.uploaded_rows = 0
+        self.failures = 0
+        self.upload_seconds = 0.0
+
+    async def __aenter__(self) -> "SpoolUploader":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._runner is None:
+            self._closing = False
+            self._runner = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._runner is None:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(asyncio.shield(self._runner), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            # An upload cut off here may still land; its batch stays spooled and is deduped on redelivery
+            for task in (self._runner, *self._in_flight.values()):
+                task.cancel()
+            await asyncio.gather(self._runner, *self._in_flight.values(), return_exceptions=True)
+            logger.warning(f"Spool not drained within {self.drain_timeout}s, {len(self.spool.pending())} batch(es) left for the next run")
+        self._runner = None
+        logger.info(f"Spool uploader closed: {self.stats()}")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = await asyncio.to_thread(self.spool.pending)
+            now = loop.time()
+            for entry_id, entry in pending.items():
+                if len(self._in_flight) >= self.concurrency:
+                    break
+                if entry_id in self._in_flight or self._retry_at.get(entry_id, 0) > now:
+                    continue
+                self._in_flight[entry_id] = asyncio.create_task(self._upload(entry_id, entry))
+            if self._closing and not pending and not self._in_flight:
+                return
+            if self._in_flight:
+                await asyncio.wait(self._in_flight.values(), timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _upload(self, entry_id: str, entry: dict) -> None:
+        started = time.monotonic()
+        try:
+            data = await asyncio.to_thread(self.spool.read, entry_id)
+            await asyncio.to_thread(self.upload, data, entry.get("mode", "incremental"))
+            await asyncio.to_thread(self.spool.mark_uploaded, entry_id)
+            self._retry_at.pop(entry_id, None)
+            self.uploaded += 1
+            self.uploaded_rows += len(data)
+            logger.info(f"Uploaded spooled batch {entry_id}: {len(data)} rows")
+            await self._notify_uploaded(entry_id, data, entry.get("mode", "incremental"))
+        except Exception as e:
+            self.failures += 1
+            attempts = await asyncio.to_thread(self.spool.mark_failed, entry_id, str(e))
+            # Never dropped: retried with capped, jittered backoff until lakeFS takes it
+            delay = min(self.initial_delay * 2 ** (attempts - 1), self.max_delay)
+            self._retry_at[entry_id] = asyncio.get_running_loop().time() + delay * random.uniform(0.8, 1.2)
+            logger.warning(f"Upload of spooled batch {entry_id} failed (attempt {attempts}), retrying in {delay:.0f}s: {e}")
+        finally:
+            self.upload_seconds += time.monotonic() - started
+            self._in_flight.pop(entry_id, None)
+
+    async def _notify_uploaded(self, entry_id: str, data: pd.DataFrame, mode: str) -> None:
+        if self.on_uploaded is None:
+            return
+        try:
+            async with self._on_uploaded_lock:
+                await asyncio.to_thread(self.on_uploaded, data, mode)
+        except Exception as e:
+            # The batch is already in lakeFS; a failed callback must not requeue it
+            logger.error(f"on_uploaded failed for spooled batch {entry_id}: {e}", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "uploaded": self.uploaded,
+            "uploaded_rows": self.uploaded_rows,
+            "failures": self.failures,
+            "in_flight": len(self._in_flight),
+            "upload_seconds": round(self.upload_seconds, 2),
+        }
@@ -0,0 +1,288 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from dotenv import load_dotenv
+import fsspec
+from fsspec.implementations.dirfs import DirFileSystem
+from fsspec.implementations.local import LocalFileSystem
+import lakefs
+from lakefs.client import Client
+from lakefs.exceptions import ConflictException
+
+# Import modern log configuration
+from config.logging.modern_log import LoggingConfig
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+load_dotenv()
+
+# One client, one filesystem and one readiness check per lakeFS endpoint for the whole process;
+# micro-batch loads run in worker threads, hence the lock
+_pool_lock = threading.Lock()
+_clients: dict[str, Client] = {}
+_ready_at: dict[str, float] = {}
+_repositories: set[tuple[str, str]] = set()
+
+def get_client(host: str) -> Client:
+    with _pool_lock:
+        client = _clients.get(host)
+        if client is None:
+            client = _clients[host] = Client(
+                host=host,
+                username=os.getenv("ACCESS_KEY"),
+                password=os.getenv("SECRET_KEY"),
+                verify_ssl=False,
+            )
+        # Reusing the client reuses its urllib3 pool, so connections stay alive between calls
+        return client
+
+def get_storage_options(lakefs_endpoint: str) -> dict:
+    return {
+        "key": os.getenv("ACCESS_KEY"),
+        "secret": os.getenv("SECRET_KEY"),
+        "client_kwargs": {
+            "endpoint_url": lakefs_endpoint
+        },
+        "config_kwargs": {
+            "max_pool_connections": 16,
+            "tcp_keepalive": True,
+        },
+    }
+
+def get_filesystem(lakefs_endpoint: str):
+    # fsspec caches instances by their arguments, so pandas' storage_options resolve to this same object
+    return fsspec.filesystem("s3", **get_storage_options(lakefs_endpoint))
+
+class LakeFSBackend:
+    def __init__(self, host: str = "http://localhost:8001"):
+        self.host = host
+        self.client = get_client(host)
+
+    def filesystem(self, lakefs_endpoint: str):
+        return get_filesystem(lakefs_endpoint)
+
+    def wait_until_ready(self, timeout: float = 60.0, initial_delay: float = 0.5, max_delay: float = 8.0, recheck_after: float = 300.0) -> None:
+        # Probe the health endpoint with exponential backoff instead of restarting the container
+        if time.monotonic() - _ready_at.get(self.host, float("-inf")) < recheck_after:
+            return
+        deadline = time.monotonic() + timeout
+        delay = initial_delay
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                self.client.sdk_client.health_check_api.health_check()
+                _ready_at[self.host] = time.monotonic()
+                if attempt > 1:
+                    logger.info(f"lakeFS at {self.host} ready after {attempt} attempts")
+                logger.debug(f"Connected to lakeFS version: {self.client.version}")
+                return
+            except Exception as e:
+                if time.monotonic() + delay > deadline:
+                    raise ConnectionError(f"lakeFS at {self.host} not ready after {timeout}s: {e}") from e
+                logger.warning(f"lakeFS at {self.host} not ready (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, max_delay)
+
+    def ensure_repository(self, repo_name: str) -> None:
+        if (self.host, repo_name) in _repositories:
+            return
+        lakefs.repository(repo_name, client=self.client).create(storage_namespace=f"local://{repo_name}", exist_ok=True)
+        _repositories.add((self.host, repo_name))
+
+    def _branch(self, repo_name: str, branch: str):
+        return lakefs.repository(repo_name, client=self.client).branch(branch)
+
+    def create_branch(self, repo_name: str, branch: str, source: str) -> None:
+        self._branch(repo_name, branch).create(source_reference=source)
+
+    def delete_branch(self, repo_name: str, branch: str) -> None:
+        self._branch(repo_name, branch).delete()
+
+    def has_uncommitted(self, repo_name: str, branch: str) -> bool:
+        return next(iter(self._branch(repo_name, branch).uncommitted(max_amount=1)), None) is not None
+
+    def commit(self, repo_name: str, branch: str, message: str, metadata: dict | None = None) -> str:
+        return self._branch(repo_name, branch).commit(message=message, metadata=metadata or {}).get_commit().id
+
+    def merge(self, repo_name: str, source: str, target: str) -> str:
+        # Raises ConflictException when both sides changed the same object
+        return self._branch(repo_name, source).merge_into(target)
+
+    def head_commit(self, repo_name: str, branch: str) -> str:
+        return self._branch(repo_name, branch).get_commit().id
+
+class LocalLakeFS(DirFileSystem):
+    # Maps s3://<repo>/<ref>/<key> onto <root>/<repo>/<ref>/<key>. Branch directories share files
+    # through hard links, so every write first unlinks the target (copy-on-write per file).
+    def __init__(self, root: str | Path, **kwargs):
+        super().__init__(path=str(root), fs=LocalFileSystem(auto_mkdir=True), **kwargs)
+
+    @classmethod
+    def _strip_protocol(cls, path):
+        if isinstance(path, list):
+            return [cls._strip_protocol(p) for p in path]
+        path = str(path)
+        for prefix in ("s3://", "s3a://", "dir://"):
+            if path.startswith(prefix):
+                path = path[len(prefix):]
+        return path.rstrip("/")
+
+    def _join(self, path):
+        return super()._join(self._strip_protocol(path))
+
+    def _unlink(self, path) -> None:
+        target = self._join(path)
+        if os.path.lexists(target):
+            os.unlink(target)
+
+    def open(self, path, mode="rb", *args, **kwargs):
+        if "w" in mode or "x" in mode:
+            self._unlink(path)
+        elif "a" in mode and os.path.lexists(self._join(path)):
+            # Appends must not leak into other branches either
+            target = self._join(path)
+            shutil.copyfile(target, target + ".cow")
+            os.replace(target + ".cow", target)
+        return super().open(path, mode, *args, **kwargs)
+
+    def pipe(self, path, value=None, **kwargs):
+        for target in (path if isinstance(path, dict) else {path: value}):
+            self._unlink(target)
+        return super().pipe(path, value, **kwargs)
+
+    def pipe_file(self, path, value, *args, **kwargs):
+        self._unlink(path)
+        return super().pipe_file(path, value, *args, **kwargs)
+
+    def put_file(self, lpath, rpath, *args, **kwargs):
+        self._unlink(rpath)
+        return super().put_file(lpath, rpath, *args, **kwargs)
+
+    def cp_file(self, path1, path2, *args, **kwargs):
+        self._unlink(path2)
+        return super().cp_file(path1, path2, *args, **kwargs)
+
+def _link_tree(source: Path, target: Path) -> None:
+    shutil.copytree(source, target, copy_function=os.link, dirs_exist_ok=True)
+
+def _inodes(root: Path) -> dict[str, int]:
+    if not root.exists():
+        return {}
+    return {
+        str(path.relative_to(root)): path.stat().st_ino
+        for path in root.rglob("*")
+        if path.is_file()
+    }
+
+class LocalBackend:
+    # In-process stand-in for lakeFS: same repo/branch/key layout, commits are hard-linked
+    # snapshots at <repo>/<commit id>, merges are three-way on file identity
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.host = f"local://{self.root}"
+        self.client = None
+        self._fs = LocalLakeFS(self.root)
+        self._lock = threading.RLock()
+
+    def filesystem(self, lakefs_endpoint: str | None = None):
+        return self._fs
+
+    def wait_until_ready(self, timeout: float = 60.0, **kwargs) -> None:
+        return
+
+    def _refs_path(self, repo_name: str) -> Path:
+        return self.root / repo_name / "_refs.json"
+
+    def _refs(self, repo_name: str) -> dict:
+        with open(self._refs_path(repo_name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_refs(self, repo_name: str, refs: dict) -> None:
+        path = self._refs_path(repo_name)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(refs, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _snapshot(self, repo_name: str, branch: str, refs: dict, message: str, metadata: dict | None) -> str:
+        commit_id = uuid.uuid4().hex
+        _link_tree(self.root / repo_name / branch, self.root / repo_name / commit_id)
+        refs["commits"][commit_id] = {
+            "parent": refs["branches"].get(branch, {}).get("head"),
+            "message": message,
+            "metadata": metadata or {},
+            "created": time.time(),
+        }
+        refs["branches"].setdefault(branch, {})["head"] = commit_id
+        return commit_id
+
+    def ensure_repository(self, repo_name: str) -> None:
+        with self._lock:
+            if self._refs_path(repo_name).exists():
+                return
+            (self.root / repo_name / "main").mkdir(parents=True, exist_ok=True)
+            refs = {"branches": {}, "commits": {}}
+            commit_id = self._snapshot(repo_name, "main", refs, "Repository created", None)
+            refs["branches"]["main"]["base"] = commit_id
+            self._write_refs(repo_name, refs)
+
+    def create_branch(self, repo_name: str, branch: str, source: str) -> None:
+        with self._lock:
+            refs = self._refs(repo_name)
+            head = refs["branches"][source]["head"]
+            # Like lakeFS, a branch starts from the source's last commit, not its staged files
+            _link_tree(self.root / repo_name / head, self.root / repo_name / branch)
+            refs["branches"][branch] = {"head": head, "base": head}
+            self._write_refs(repo_name, refs)
+
+    def delete_branch(self, repo_name: str, branch: str) -> None:
+        with self._lock:
+            refs = self._refs(repo_name)
+            refs["branches"].pop(branch, None)
+            self._write_refs(repo_name, refs)
+            shutil.rmtree(self.root / repo_name / branch, ignore_errors=True)
+
+    def has_uncommitted(self, repo_name: str, branch: str) -> bool:
+        with self._lock:
+            head = self._refs(repo_name)["branches"][branch]["head"]
+            return _inodes(self.root / repo_name / branch) != _inodes(self.root / repo_name / head)
+
+    def commit(self, repo_name: str, branch: str, message: str, metadata: dict | None = None) -> str:
+        with self._lock:
+            refs = self._refs(repo_name)
+            commit_id = self._snapshot(repo_name, branch, refs, message, metadata)
+            self._write_refs(repo_name, refs)
+            return commit_id
+
+    def merge(self, repo_name: str, source: str, target: str) -> str:
+        with self._lock:
+            refs = self._refs(repo_name)
+            repo_root = self.root / repo_name
+            base = _inodes(repo_root / refs["branches"][source]["base"])
+            ours = _inodes(repo_root / refs["branches"][target]["head"])
+            theirs = _inodes(repo_root / refs["branches"][source]["head"])
+            source_changes = {path for path in base.keys() | theirs.keys() if base.get(path) != theirs.get(path)}
+            target_changes = {path for path in base.keys() | ours.keys() if base.get(path) != ours.get(path)}
+            conflicts = {path for path in source_changes & target_changes if ours.get(path) != theirs.get(path)}
+            if conflicts:
+                raise ConflictException(409, f"Merge conflict on {sorted(conflicts)[:5]}", None)
+            source_head = repo_root / refs["branches"][source]["head"]
+            for path in sorted(source_changes):
+                destination = repo_root / target / path
+                if destination.exists():
+                    destination.unlink()
+                if path in theirs:
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    os.link(source_head / path, destination)
+            commit_id = self._snapshot(repo_name, target, refs, f"Merge '{source}' into '{target}'", {"source": source})
+            self._write_refs(repo_name, refs)
+            return commit_id
+
+    def head_commit(self, repo_name: str, branch: str) -> str:
+        return self._refs(repo_name)["branches"][branch]["head"]
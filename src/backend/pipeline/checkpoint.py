@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import path configuration
+from config.path_config import BACKFILL_DIR
+# Import tag name to file name helper
+from src.backend.scraping.replay import slugify_tag
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+def record_key(username: str, tweet_text: str) -> str:
+    # Same identity as the dedup key, hashed so the flushed-key log stays small
+    return hashlib.blake2b(f"{username}\x00{tweet_text}".encode("utf-8"), digest_size=8).hexdigest()
+
+class BackfillCheckpoint:
+    def __init__(self, directory: str | Path = BACKFILL_DIR):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / "manifest.json"
+        self.flushed_path = self.directory / "flushed.txt"
+        # tag -> {"done": bool, "scrolls": int, "spooled": int}
+        self.progress: dict[str, dict] = {}
+        self.flushed: set[str] = set()
+        self.resumed = False
+        self._spools: dict[str, object] = {}
+
+    def load(self) -> "BackfillCheckpoint":
+        if self.manifest_path.exists():
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.progress = json.load(f)
+            self.resumed = True
+        if self.flushed_path.exists():
+            with open(self.flushed_path, "r", encoding="utf-8") as f:
+                self.flushed = {line.strip() for line in f if line.strip()}
+        if self.resumed:
+            done = sum(1 for state in self.progress.values() if state["done"])
+            logger.info(f"Resuming backfill: {done}/{len(self.progress)} tags done, {len(self.flushed)} tweets already loaded")
+        return self
+
+    def is_done(self, tag: str) -> bool:
+        return self.progress.get(tag, {}).get("done", False)
+
+    def _spool_path(self, tag: str) -> Path:
+        return self.directory / f"{slugify_tag(tag)}.jsonl"
+
+    def _write(self, tag: str, record: dict) -> None:
+        handle = self._spools.get(tag)
+        if handle is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            handle = self._spools[tag] = open(self._spool_path(tag), "a", encoding="utf-8")
+        handle.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def spool(self, tag: str, record: dict) -> None:
+        self._write(tag, record)
+        state = self.progress.setdefault(tag, {"done": False, "scrolls": 0, "spooled": 0})
+        state["spooled"] += 1
+
+    def update(self, record: dict) -> None:
+        # Appended to the owner tag's spool; spooled_records keeps the last line per tweet, so the
+        # tags/categories merged in after the record was first spooled survive a restart
+        self._write(record["tag"], record)
+        handle = self._spools[record["tag"]]
+        handle.flush()
+        os.fsync(handle.fileno())
+
+    def mark_scroll(self, tag: str, scrolls: int) -> None:
+        # Records are durable before the manifest says the scroll happened
+        handle = self._spools.get(tag)
+        if handle is not None:
+            handle.flush()
+            os.fsync(handle.fileno())
+        self.progress.setdefault(tag, {"done": False, "scrolls": 0, "spooled": 0})["scrolls"] = scrolls
+        self._write_manifest()
+
+    def mark_done(self, tag: str) -> None:
+        self.mark_scroll(tag, self.progress.get(tag, {}).get("scrolls", 0))
+        self.progress[tag]["done"] = True
+        self._write_manifest()
+        handle = self._spools.pop(tag, None)
+        if handle is not None:
+            handle.close()
+
+    def mark_flushed(self, records: list[dict]) -> None:
+        keys = [record_key(record["username"], record["tweetText"]) for record in records]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.flushed_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{key}\n" for key in keys))
+            f.flush()
+            os.fsync(f.fileno())
+        self.flushed.update(keys)
+
+    def spooled_records(self) -> Iterator[dict]:
+        # Last line per tweet wins: update() appends the record again once other tags merge into it
+        records: dict[tuple, dict] = {}
+        for tag in self.progress:
+            path = self._spool_path(tag)
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # The last line of a spool can be torn by a crash mid-write
+                        continue
+                    records[(record["username"], record["tweetText"])] = record
+        for record in records.values():
+            record["postTimeRaw"] = datetime.fromisoformat(record["postTimeRaw"])
+            yield record
+
+    def close(self) -> None:
+        for handle in self._spools.values():
+            handle.close()
+        self._spools = {}
+
+    def clear(self) -> None:
+        self.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.progress = {}
+        self.flushed = set()
+        logger.info(f"Backfill finished, removed checkpoint {self.directory}")
+
+    def _write_manifest(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".manifest-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.progress, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.manifest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -1,13 +1,38 @@
 from prefect import flow, task
+from prefect.cache_policies import NO_CACHE
 from prefect.schedules import Interval
+from prefect.client.schemas.objects import ConcurrencyLimitConfig, ConcurrencyLimitStrategy
 from pathlib import Path
 import pandas as pd
 from datetime import timedelta
 import asyncio
+from contextlib import nullcontext
 # Import XScraping for scraping
 from src.backend.scraping.x_scraping import XScraping
+# Import browser pool
+from src.backend.scraping.browser_pool import BrowserPool
+# Import request blocking policy
+from src.backend.scraping.resource_policy import ResourcePolicy
+# Import adaptive scroll pacing
+from src.backend.scraping.pacing import AdaptivePacer
+# Import tag scheduler
+from src.backend.pipeline.tag_scheduler import TagScheduler
+# Import yield-based tag priority
+from src.backend.pipeline.tag_priority import TagPriority
+# Import multi-account session registry
+from src.backend.scraping.session_registry import SessionRegistry
+# Import micro-batch sink
+from src.backend.pipeline.micro_batch import MicroBatchSink
+# Import cross-tag dedup registry
+from src.backend.scraping.dedup import DedupRegistry
+# Import per-tag watermark
+from src.backend.scraping.watermark import Watermark, WatermarkStore
+# Import scraper metrics
+from src.backend.scraping.metrics import push_metrics, start_metrics_server
 # Import LakeFS loader
 from src.backend.load.lakefs_loader import LakeFSLoader
+# Import local load spool and background uploader
+from src.backend.load.spool import LoadSpool, SpoolUploader, lakefs_upload
 # Import validation configuration
 from src.backend.validation.validate import ValidationPydantic, TweetData
 # Import modern logging configuration
@@ -17,14 +42,17 @@ from config.path_config import tags
 
 logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
 
+# A run is bounded by its last tag start + one tag timeout + the spool drain, plus a minute for
+# session probes and the final flush; together they fit inside the 15-minute schedule
+INTERVAL = timedelta(minutes=15)
+TAG_TIMEOUT = 5 * 60
+DRAIN_TIMEOUT = 2 * 60
+RUN_TIMEOUT = INTERVAL.total_seconds() - TAG_TIMEOUT - DRAIN_TIMEOUT - 60
+
 @task
 def encode_tags(tags: dict[str, list[str]]) -> dict[str, dict[str, str]]:
     return XScraping().encode_tag_to_url(tags)
 
-@task
-def flatten_results(nested_results: list[list[dict]]) -> list[dict]:
-    return [entry for result in nested_results for entry in result]
-
 @task
 def to_dataframe(tweets: list[dict]) -> pd.DataFrame:
     return XScraping.to_dataframe(tweets)
@@ -34,58 +62,98 @@ def validate_dataframe(data: pd.DataFrame) -> bool:
     validator = ValidationPydantic(TweetData)
     return validator.validate(df=data, scrape_new=True)
 
-@task
-def load_to_lakefs(data: pd.DataFrame, lakefs_endpoint: str = None) -> None:
-    LakeFSLoader(host=lakefs_endpoint).incremental_load(data=data, lakefs_endpoint=lakefs_endpoint)
+@task(cache_policy=NO_CACHE)
+def load_to_lakefs(loader: LakeFSLoader, data: pd.DataFrame, lakefs_endpoint: str = None) -> None:
+    loader.incremental_load(data=data, lakefs_endpoint=lakefs_endpoint)
 
-@task
-async def scrape_tag(category: str, tag: str, tag_url: str, max_scrolls: int) -> list[dict]:
-    return await XScraping().scrape_all_tweet_texts(category=category, tag=tag, tag_url=tag_url, max_scrolls=max_scrolls)
+@task(cache_policy=NO_CACHE)
+def spool_batch(spool: LoadSpool, data: pd.DataFrame) -> str:
+    # Redelivery after a crash is harmless: incremental_load drops keys that are already stored
+    return spool.write(data, mode="incremental")
 
-async def scrape_flow():
+@task
+def advance_watermarks(data: pd.DataFrame) -> None:
+    WatermarkStore().advance(data)
+
+@task(cache_policy=NO_CACHE)
+async def scrape_tag(category: str, tag: str, tag_url: str, max_scrolls: int, pool: BrowserPool, sink: MicroBatchSink, mode: str = "dom", watermark: Watermark | None = None, pacer: AdaptivePacer | None = None, dedup: DedupRegistry | None = None, raise_on_block: bool = False) -> int:
+    count = 0
+    async for record in XScraping().iter_tweet_texts(category=category, tag=tag, tag_url=tag_url, max_scrolls=max_scrolls, pool=pool, mode=mode, watermark=watermark, pacer=pacer, dedup=dedup, raise_on_block=raise_on_block):
+        await sink.put(record)
+        count += 1
+    return count
+
+async def scrape_flow(scrape_mode: str = "dom", block_resources: bool = False, use_spool: bool = True):
     tag_urls = encode_tags(tags)
-    semaphore = asyncio.Semaphore(3)
-    delay_seconds = 30
-
-    async def scrape_with_limit(category: str, tag: str, url: str):
-        async with semaphore:
-            return await scrape_tag(category=category, tag=tag, tag_url=url, max_scrolls=1)
-        
-    task_list = [
+    # Scrape page/scroll/block metrics: served on METRICS_PORT and/or pushed to PUSHGATEWAY_URL at the end
+    start_metrics_server()
+    watermarks = WatermarkStore().load()
+    # Shared by all in-flight tags so a tweet under several tracked hashtags is stored once
+    dedup = DedupRegistry()
+
+    # Tags that keep producing new tweets run every interval with more scrolls; quiet ones less often
+    priority = TagPriority().load()
+    task_list = priority.plan([
         (category, tag, url)
         for category, tag_url_dict in tag_urls.items()
         for tag, url in tag_url_dict.items()
-    ]
-
-    all_results = []
-
-    for i in range(0, len(task_list), 3):
-        batch = task_list[i:i+3]
-        futures = [
-            scrape_with_limit(category, tag, url)
-            for category, tag, url in batch
-        ]
-        results = await asyncio.gather(*futures)
-        all_results.extend(results)
-
-        if i + 3 < len(task_list):
-            logger.info(f"Completed batch {i//3 + 1}. Sleeping for {delay_seconds} seconds...")
-            await asyncio.sleep(delay_seconds)
-
-    all_tweets = flatten_results(all_results)
-    data = to_dataframe(all_tweets)
-
-    logger.info(f"Total tweets scraped: {len(data)}")
-
-    is_valid = validate_dataframe(data=data)
-    if is_valid:
-        load_to_lakefs(data=data, lakefs_endpoint="http://lakefsdb:8000")
-    else:
-        logger.warning("Validation failed, data not saved.")
+    ])
+
+    lakefs_endpoint = "http://lakefsdb:8000"
+    # With the spool, batches go to local disk and a background uploader pushes them to lakeFS,
+    # so a slow or restarting lakeFS neither blocks scraping nor loses a batch
+    spool = LoadSpool() if use_spool else None
+    loader = None if use_spool else LakeFSLoader(host=lakefs_endpoint)
+
+    def process_batch(batch: list[dict], batch_number: int) -> None:
+        data = to_dataframe(batch)
+        logger.info(f"Micro-batch {batch_number}: {len(data)} tweets")
+
+        is_valid = validate_dataframe(data=data)
+        if is_valid:
+            if spool is not None:
+                # The watermark advances in on_uploaded, once lakeFS has the batch
+                spool_batch(spool=spool, data=data)
+            else:
+                load_to_lakefs(loader=loader, data=data, lakefs_endpoint=lakefs_endpoint)
+                advance_watermarks(data=data)
+        else:
+            logger.warning("Validation failed, data not saved.")
+
+    # Skip images, video, fonts and analytics; only text, usernames and timestamps are read
+    resource_policy = ResourcePolicy() if block_resources else None
+    # One browser pool, pacer and navigation budget per X account; 3 tags in flight on each,
+    # and a tag whose session gets blocked moves to another one
+    # The session probes are blocking HTTP calls, so keep them off the event loop
+    sessions = await asyncio.to_thread(SessionRegistry.from_dir, concurrency_per_session=3, navigations_per_minute=6, pool_options={"resource_policy": resource_policy})
+    # No tag starts after RUN_TIMEOUT, so the run ends before the next one is scheduled
+    scheduler = TagScheduler(tag_timeout=TAG_TIMEOUT, sessions=sessions, run_timeout=RUN_TIMEOUT)
+    # Flush every 200 tweets or minute so new tweets land before the slowest tag finishes
+    sink = MicroBatchSink(process_batch, batch_size=200, flush_interval=60, before_flush=dedup.release)
+    # Also picks up batches a previous run spooled but could not upload
+    uploader = SpoolUploader(spool, lakefs_upload(lakefs_endpoint), drain_timeout=DRAIN_TIMEOUT, on_uploaded=lambda data, mode: WatermarkStore().advance(data)) if spool is not None else nullcontext()
+    async with uploader, sessions, sink:
+        async def scrape_one(category: str, tag: str, url: str, max_scrolls: int, session):
+            return await scrape_tag(category=category, tag=tag, tag_url=url, max_scrolls=max_scrolls, pool=session.pool, sink=sink, mode=scrape_mode, watermark=watermarks.get(tag), pacer=session.pacer, dedup=dedup, raise_on_block=True)
+
+        counts = await scheduler.run(task_list, scrape_one, default=None)
+
+    # A tag's yield is what it found, including tweets another tag had already claimed
+    priority.record({job[1]: count + dedup.merged_by_tag[job[1]] if count is not None else None for job, count in zip(task_list, counts)})
+    counts = [count for count in counts if count is not None]
+    logger.info(f"Sessions at end of run: {sessions.stats()}")
+    logger.info(f"Cross-tag dedup: {dedup.stats()}")
+    if spool is not None:
+        logger.info(f"Spool upload: {uploader.stats()}")
+    push_metrics(job="incremental_scrape")
+    if not sum(counts):
+        logger.info("No tweets newer than the stored watermarks.")
+        return
+    logger.info(f"Total tweets scraped: {sum(counts)} | Sink: {sink.stats()}")
 
 @flow(name="Incremental Scrape Flow")
-def scrape_flow_wrapper():
-    asyncio.run(scrape_flow())
+def scrape_flow_wrapper(scrape_mode: str = "dom", block_resources: bool = False, use_spool: bool = True):
+    asyncio.run(scrape_flow(scrape_mode=scrape_mode, block_resources=block_resources, use_spool=use_spool))
 
 if __name__ == "__main__":
     scrape_flow_wrapper.from_source(
@@ -95,7 +163,9 @@ if __name__ == "__main__":
         name="scrape-x-every-15m",
         work_pool_name="x-worker",
         schedule=Interval(
-            timedelta(minutes=15),
+            INTERVAL,
             timezone="Asia/Bangkok"
-        )
+        ),
+        # Should a run still outlast the interval (e.g. a slow Prefect start), the next one is cancelled, not stacked
+        concurrency_limit=ConcurrencyLimitConfig(limit=1, collision_strategy=ConcurrencyLimitStrategy.CANCEL_NEW),
     )
\ No newline at end of file
@@ -1,12 +1,36 @@
 from prefect import flow, task
+from prefect.cache_policies import NO_CACHE
 import pandas as pd
 import os
 import asyncio
+from contextlib import nullcontext
 
 # Import XScraping for scraping
 from src.backend.scraping.x_scraping import XScraping
+# Import browser pool
+from src.backend.scraping.browser_pool import BrowserPool
+# Import request blocking policy
+from src.backend.scraping.resource_policy import ResourcePolicy
+# Import adaptive scroll pacing
+from src.backend.scraping.pacing import AdaptivePacer
+# Import tag scheduler
+from src.backend.pipeline.tag_scheduler import TagScheduler
+# Import multi-account session registry
+from src.backend.scraping.session_registry import SessionRegistry
+# Import micro-batch sink
+from src.backend.pipeline.micro_batch import MicroBatchSink
+# Import backfill checkpoint
+from src.backend.pipeline.checkpoint import BackfillCheckpoint, record_key
+# Import cross-tag dedup registry
+from src.backend.scraping.dedup import DedupRegistry
+# Import per-tag watermark
+from src.backend.scraping.watermark import WatermarkStore
+# Import scraper metrics
+from src.backend.scraping.metrics import push_metrics, start_metrics_server
 # Import LakeFS loader
 from src.backend.load.lakefs_loader import LakeFSLoader
+# Import local load spool and background uploader
+from src.backend.load.spool import LoadSpool, SpoolUploader, lakefs_upload
 # Import validation configuration
 from src.backend.validation.validate import ValidationPydantic, TweetData
 # Import modern logging configuration
@@ -20,77 +44,138 @@ logger = LoggingConfig(level="DEBUG", level_console="DEBUG").get_logger()
 def encode_tags(tags: dict[str, list[str]]) -> dict[str, dict[str, str]]:
     return XScraping().encode_tag_to_url(tags)
 
-@task
-def flatten_results(nested_results: list[list[dict]]) -> list[dict]:
-    return [entry for result in nested_results for entry in result]
-
 @task
 def to_dataframe(tweets: list[dict]) -> pd.DataFrame:
     return XScraping.to_dataframe(tweets)
 
 @task
-def validate_dataframe(data: pd.DataFrame) -> bool:
+def validate_dataframe(data: pd.DataFrame, scrape_new: bool = False) -> bool:
     validator = ValidationPydantic(TweetData)
-    return validator.validate(data)
+    return validator.validate(data, scrape_new=scrape_new)
 
 @task
-def save_to_csv(data: pd.DataFrame, path: str = "/root/flows/data/from_prefect/tweet_data.csv") -> None:
+def save_to_csv(data: pd.DataFrame, path: str = "/root/flows/data/from_prefect/tweet_data.csv", append: bool = False) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    data.to_csv(path, index=False)
+    data.to_csv(path, index=False, mode="a" if append else "w", header=not append)
     logger.info(f"CSV file saved to {path}")
 
-@task
-def load_to_lakefs(data: pd.DataFrame, lakefs_endpoint: str = None) -> None:
-    LakeFSLoader(host=lakefs_endpoint).load(data=data, lakefs_endpoint=lakefs_endpoint)
+@task(cache_policy=NO_CACHE)
+def load_to_lakefs(loader: LakeFSLoader, data: pd.DataFrame, lakefs_endpoint: str = None) -> None:
+    loader.load(data=data, lakefs_endpoint=lakefs_endpoint)
+
+@task(cache_policy=NO_CACHE)
+def spool_batch(spool: LoadSpool, data: pd.DataFrame) -> str:
+    # Redelivery after a crash is harmless: incremental_load drops keys that are already stored
+    return spool.write(data, mode="incremental")
 
 @task
-async def scrape_tag(category: str, tag: str, tag_url: str) -> list[dict]:
-    return await XScraping().scrape_all_tweet_texts(category=category, tag=tag, tag_url=tag_url, max_scrolls=30)
+def advance_watermarks(data: pd.DataFrame) -> None:
+    WatermarkStore().advance(data)
+
+@task(cache_policy=NO_CACHE)
+async def scrape_tag(category: str, tag: str, tag_url: str, pool: BrowserPool, sink: MicroBatchSink, mode: str = "dom", pacer: AdaptivePacer | None = None, dedup: DedupRegistry | None = None, raise_on_block: bool = False, checkpoint: BackfillCheckpoint | None = None) -> int:
+    count = 0
+    on_scroll = (lambda scrolls: checkpoint.mark_scroll(tag, scrolls)) if checkpoint is not None else None
+    async for record in XScraping().iter_tweet_texts(category=category, tag=tag, tag_url=tag_url, max_scrolls=30, pool=pool, mode=mode, pacer=pacer, dedup=dedup, raise_on_block=raise_on_block, on_scroll=on_scroll):
+        if checkpoint is not None:
+            checkpoint.spool(tag, record)
+        await sink.put(record)
+        count += 1
+    if checkpoint is not None:
+        checkpoint.mark_done(tag)
+    return count
 
 @flow(name="Initial Scrape Flow")
-async def scrape_flow():
+async def scrape_flow(scrape_mode: str = "dom", block_resources: bool = False, use_spool: bool = True):
 
     tag_urls = encode_tags(tags)
-    semaphore = asyncio.Semaphore(3)
-    delay_seconds = 30
-
-    async def scrape_with_limit(category: str, tag: str, url: str):
-        async with semaphore:
-            return await scrape_tag(category=category, tag=tag, tag_url=url)
-        
+    # Scrape page/scroll/block metrics: served on METRICS_PORT and/or pushed to PUSHGATEWAY_URL at the end
+    start_metrics_server()
+    # Completed tags and their spooled tweets survive a crash; a restart only does what is left
+    checkpoint = BackfillCheckpoint().load()
+    # Shared by all in-flight tags so a tweet under several tracked hashtags is stored once;
+    # a merge rewrites the owner's spool entry so the extra tags are not lost on a restart
+    dedup = DedupRegistry(on_merge=checkpoint.update)
     task_list = [
         (category, tag, url)
         for category, tag_url_dict in tag_urls.items()
         for tag, url in tag_url_dict.items()
+        if not checkpoint.is_done(tag)
     ]
-
-    all_results = []
-
-    for i in range(0, len(task_list), 3):
-        batch = task_list[i:i+3]
-        futures = [
-            scrape_with_limit(category, tag, url)
-            for category, tag, url in batch
-        ]
-        results = await asyncio.gather(*futures)
-        all_results.extend(results)
-
-        if i + 3 < len(task_list):
-            logger.info(f"Completed batch {i//3 + 1}. Sleeping for {delay_seconds} seconds...")
-            await asyncio.sleep(delay_seconds)
-
-    all_tweets = flatten_results(all_results)
-    data = to_dataframe(all_tweets)
-
-    logger.info(f"Total tweets scraped: {len(data)}")
-
-    is_valid = validate_dataframe(data=data)
-    is_valid = True
-    if is_valid:
-        save_to_csv(data)
-        load_to_lakefs(data=data, lakefs_endpoint="http://lakefsdb:8000")
+    logger.info(f"Tags to scrape: {len(task_list)}")
+
+    lakefs_endpoint = "http://lakefsdb:8000"
+    # With the spool, batches go to local disk and a background uploader pushes them to lakeFS,
+    # so a slow or restarting lakeFS neither blocks scraping nor loses a batch
+    spool = LoadSpool() if use_spool else None
+    loader = None if use_spool else LakeFSLoader(host=lakefs_endpoint)
+
+    def process_batch(batch: list[dict], batch_number: int) -> None:
+        data = to_dataframe(batch)
+        logger.info(f"Micro-batch {batch_number}: {len(data)} tweets")
+
+        is_valid = validate_dataframe(data=data, scrape_new=True)
+        is_valid = True
+        if is_valid:
+            save_to_csv(data, append=batch_number > 1 or checkpoint.resumed)
+            if spool is not None:
+                # Flushed keys and watermarks are recorded in on_uploaded, once lakeFS has the batch
+                spool_batch(spool=spool, data=data)
+            else:
+                load_to_lakefs(loader=loader, data=data, lakefs_endpoint=lakefs_endpoint)
+                checkpoint.mark_flushed(batch)
+                advance_watermarks(data=data)
+        else:
+            logger.warning("Validation failed, data not saved.")
+
+    # Skip images, video, fonts and analytics; only text, usernames and timestamps are read
+    resource_policy = ResourcePolicy() if block_resources else None
+    # One browser pool, pacer and navigation budget per X account; 3 tags in flight on each,
+    # and a tag whose session gets blocked moves to another one
+    # The session probes are blocking HTTP calls, so keep them off the event loop
+    sessions = await asyncio.to_thread(SessionRegistry.from_dir, concurrency_per_session=3, navigations_per_minute=6, pool_options={"resource_policy": resource_policy})
+    scheduler = TagScheduler(tag_timeout=45 * 60, sessions=sessions)
+    # Flush every 500 tweets or 2 minutes so memory stays flat and data lands while tags are still running
+    sink = MicroBatchSink(process_batch, batch_size=500, flush_interval=120, before_flush=dedup.release)
+    # Also picks up batches a previous run spooled but could not upload
+    def on_uploaded(data: pd.DataFrame, mode: str) -> None:
+        checkpoint.mark_flushed(data[["username", "tweetText"]].to_dict(orient="records"))
+        WatermarkStore().advance(data)
+
+    uploader = SpoolUploader(spool, lakefs_upload(lakefs_endpoint), on_uploaded=on_uploaded) if spool is not None else nullcontext()
+    async with uploader, sessions, sink:
+        # Merge what the previous run spooled: reload what never reached lakeFS, skip the rest
+        resumed = 0
+        for record in checkpoint.spooled_records():
+            key = (record["username"], record["tweetText"])
+            if key in dedup:
+                continue
+            if record_key(*key) in checkpoint.flushed:
+                dedup.preload([key])
+            elif dedup.claim(key, record):
+                await sink.put(record)
+                resumed += 1
+        if checkpoint.resumed:
+            logger.info(f"Requeued {resumed} spooled tweets from the previous run")
+
+        async def scrape_one(category: str, tag: str, url: str, session):
+            return await scrape_tag(category=category, tag=tag, tag_url=url, pool=session.pool, sink=sink, mode=scrape_mode, pacer=session.pacer, dedup=dedup, raise_on_block=True, checkpoint=checkpoint)
+
+        counts = await scheduler.run(task_list, scrape_one, default=0)
+
+    logger.info(f"Sessions at end of run: {sessions.stats()}")
+    logger.info(f"Cross-tag dedup: {dedup.stats()}")
+    if spool is not None:
+        logger.info(f"Spool upload: {uploader.stats()}")
+    push_metrics(job="initial_scrape")
+    logger.info(f"Total tweets scraped: {sum(counts)} | Sink: {sink.stats()}")
+
+    # Keep the checkpoint until lakeFS has every spooled batch, so its tweets can still be requeued
+    if all(checkpoint.is_done(tag) for _, tag, _ in task_list) and not sink.failed_batches and not (spool is not None and spool.pending()):
+        checkpoint.clear()
     else:
-        logger.warning("Validation failed, data not saved.")
+        checkpoint.close()
+        logger.warning(f"Backfill incomplete, checkpoint kept in {checkpoint.directory}; rerun to resume")
 
     
 
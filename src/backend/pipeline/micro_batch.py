@@ -0,0 +1,108 @@
+import asyncio
+import time
+from typing import Any, Callable
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+_CLOSED = object()
+
+class MicroBatchSink:
+    def __init__(
+        self,
+        handler: Callable[[list[dict], int], Any],
+        batch_size: int = 500,
+        flush_interval: float = 60.0,
+        max_pending: int = 2000,
+        before_flush: Callable[[list[dict]], None] | None = None,
+    ):
+        # handler(batch, batch_number) is blocking (pandas, lakeFS) and runs in a worker thread
+        self.handler = handler
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # before_flush runs on the event loop, before the batch leaves it
+        self.before_flush = before_flush
+        # Bounded so scrapers wait instead of piling up records while a flush is slow
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._consumer: asyncio.Task | None = None
+
+        self.received = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.flush_seconds = 0.0
+
+    async def __aenter__(self) -> "MicroBatchSink":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._consumer is None:
+            self._consumer = asyncio.create_task(self._run())
+
+    async def put(self, record: dict) -> None:
+        # A dead consumer never drains the queue, so fail here instead of blocking on a full one
+        if self._consumer is not None and self._consumer.done():
+            raise RuntimeError("Micro-batch consumer is no longer running") from (None if self._consumer.cancelled() else self._consumer.exception())
+        await self._queue.put(record)
+        self.received += 1
+
+    async def close(self) -> None:
+        if self._consumer is None:
+            return
+        await self._queue.put(_CLOSED)
+        await self._consumer
+        self._consumer = None
+        logger.info(f"Micro-batch sink closed: {self.stats()}")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        batch: list[dict] = []
+        deadline = loop.time() + self.flush_interval
+        while True:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                item = None
+            if item is _CLOSED:
+                await self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or loop.time() >= deadline:
+                await self._flush(batch)
+                batch = []
+                deadline = loop.time() + self.flush_interval
+
+    async def _flush(self, batch: list[dict]) -> None:
+        if not batch:
+            return
+        self.batches += 1
+        started = time.monotonic()
+        try:
+            if self.before_flush is not None:
+                self.before_flush(batch)
+            await asyncio.to_thread(self.handler, batch, self.batches)
+            self.flushed += len(batch)
+        except Exception as e:
+            # Keep streaming: one bad batch should not stop the tags still being scraped
+            self.failed_batches += 1
+            logger.error(f"Micro-batch {self.batches} ({len(batch)} tweets) failed: {e}", exc_info=True)
+        finally:
+            self.flush_seconds += time.monotonic() - started
+        logger.info(f"Flushed micro-batch {self.batches}: {len(batch)} tweets")
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "flushed": self.flushed,
+            "pending": self._queue.qsize(),
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "flush_seconds": round(self.flush_seconds, 2),
+        }
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import path configuration
+from config.path_config import TAG_YIELD_PATH
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+# (name, minimum average new tweets per run, run at most every N minutes, scroll budget)
+# The last tier is the minimum guarantee: even a dead tag is looked at once a day
+YIELD_TIERS = (
+    ("hot", 20.0, 0, 3),
+    ("warm", 2.0, 0, 1),
+    ("cool", 0.5, 60, 1),
+    ("cold", 0.05, 6 * 60, 1),
+    ("dead", 0.0, 24 * 60, 1),
+)
+
+@dataclass
+class TagYield:
+    average: float = 0.0
+    runs: int = 0
+    last_new: int = 0
+    last_run: str | None = None
+
+class TagPriority:
+    def __init__(self, path: str | Path = TAG_YIELD_PATH, smoothing: float = 0.3, tiers: tuple = YIELD_TIERS):
+        self.path = Path(path)
+        # Weight of the newest run in the moving average
+        self.smoothing = smoothing
+        self.tiers = tiers
+        self.yields: dict[str, TagYield] = {}
+
+    def load(self) -> "TagPriority":
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            self.yields = {tag: TagYield(**value) for tag, value in raw.items()}
+        except FileNotFoundError:
+            self.yields = {}
+        except (OSError, json.JSONDecodeError, TypeError) as e:
+            logger.error(f"Could not read tag yields from {self.path}: {e}")
+            self.yields = {}
+        return self
+
+    def tier(self, tag: str) -> tuple:
+        history = self.yields.get(tag)
+        if history is None or history.runs == 0:
+            # Unknown tags are treated as hot until they prove otherwise
+            return self.tiers[0]
+        for tier in self.tiers:
+            if history.average >= tier[1]:
+                return tier
+        return self.tiers[-1]
+
+    def is_due(self, tag: str, now: datetime | None = None) -> bool:
+        now = now or datetime.now()
+        history = self.yields.get(tag)
+        _, _, every_minutes, _ = self.tier(tag)
+        if history is None or history.last_run is None or every_minutes == 0:
+            return True
+        # Small slack so a 60-minute tag is not pushed to the next run by scheduling jitter
+        return now - datetime.fromisoformat(history.last_run) >= timedelta(minutes=every_minutes) - timedelta(minutes=1)
+
+    def plan(self, jobs: list[tuple], now: datetime | None = None) -> list[tuple]:
+        # jobs are (category, tag, url); returns the due ones as (category, tag, url, max_scrolls), best yield first
+        due = [job for job in jobs if self.is_due(job[1], now)]
+        due.sort(key=lambda job: self.yields.get(job[1], TagYield(average=float("inf"))).average, reverse=True)
+        tiers = Counter(self.tier(tag)[0] for _, tag, _ in due)
+        logger.info(f"Tag plan: {len(due)}/{len(jobs)} tags due {dict(tiers)}")
+        return [(category, tag, url, self.tier(tag)[3]) for category, tag, url in due]
+
+    def record(self, results: dict[str, int | None], now: datetime | None = None) -> None:
+        now = now or datetime.now()
+        for tag, new_tweets in results.items():
+            # None means the tag failed or timed out, which says nothing about its yield
+            if new_tweets is None:
+                continue
+            history = self.yields.setdefault(tag, TagYield())
+            if history.runs == 0:
+                history.average = float(new_tweets)
+            else:
+                history.average = self.smoothing * new_tweets + (1 - self.smoothing) * history.average
+            history.runs += 1
+            history.last_new = new_tweets
+            history.last_run = now.isoformat(timespec="seconds")
+        self._write()
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {tag: asdict(history) for tag, history in self.yields.items()}
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".tag-yield-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import block signal raised by the scraper
+from src.backend.scraping.pacing import SessionBlockedError, SessionUnavailableError
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, capacity: int = 1):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    async def acquire(self) -> float:
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                delay = (1 - self.tokens) / self.rate_per_second
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= 1
+        return waited
+
+class TagScheduler:
+    def __init__(self, concurrency: int = 3, navigations_per_minute: float = 6.0, burst: int | None = None, tag_timeout: float | None = None, sessions=None, max_failovers: int = 2, run_timeout: float | None = None):
+        # With a SessionRegistry, each job runs on a session and uses that session's navigation budget
+        self.sessions = sessions
+        self.concurrency = sessions.capacity if sessions is not None else concurrency
+        self.tag_timeout = tag_timeout
+        # No job starts later than run_timeout after run(); the rest are skipped so a run can't overlap the next one
+        self.run_timeout = run_timeout
+        self.max_failovers = max_failovers
+        self.bucket = TokenBucket(navigations_per_minute, capacity=burst or self.concurrency)
+
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.failed = 0
+        self.skipped = 0
+        self.failovers = 0
+        self._busy_seconds = 0.0
+        self._started_at: float | None = None
+        self._deadline: float | None = None
+        self._workers: list[asyncio.Task] = []
+
+    async def run(self, jobs: list[tuple], worker: Callable[..., Awaitable[Any]], default: Any = None) -> list[Any]:
+        queue: asyncio.Queue[tuple[int, tuple, int]] = asyncio.Queue()
+        for index, job in enumerate(jobs):
+            queue.put_nowait((index, job, 0))
+        results = [default] * len(jobs)
+        self.queued = queue.qsize()
+        self._started_at = time.monotonic()
+
+        async def run_worker(worker_id: int) -> None:
+            while True:
+                try:
+                    index, job, attempt = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                self.queued = queue.qsize()
+                if self._deadline is not None and time.monotonic() >= self._deadline:
+                    self.skipped += 1
+                    logger.warning(f"Worker {worker_id}: job {job[:2]} skipped, run deadline of {self.run_timeout}s passed")
+                    continue
+                if self.sessions is None:
+                    session = None
+                    await self.bucket.acquire()
+                else:
+                    try:
+                        session = await self.sessions.acquire(timeout=self._acquire_timeout())
+                    except SessionUnavailableError as e:
+                        # Every account is cooling down past the deadline: skip rather than stall the run
+                        self.skipped += 1
+                        logger.warning(f"Worker {worker_id}: job {job[:2]} skipped: {e}")
+                        continue
+                self.in_flight += 1
+                started = time.monotonic()
+                try:
+                    call = worker(*job) if session is None else worker(*job, session=session)
+                    results[index] = await asyncio.wait_for(call, timeout=self.tag_timeout)
+                    self.completed += 1
+                    if session is not None:
+                        self.sessions.report_success(session)
+                except SessionBlockedError as e:
+                    if session is not None:
+                        self.sessions.report_block(session)
+                    if session is not None and attempt < self.max_failovers:
+                        # Hand the job to whichever session is healthy next
+                        self.failovers += 1
+                        queue.put_nowait((index, job, attempt + 1))
+                        self.queued = queue.qsize()
+                        logger.warning(f"Worker {worker_id}: job {job[:2]} blocked on {session.name}, failing over ({attempt + 1}/{self.max_failovers})")
+                    else:
+                        self.failed += 1
+                        logger.error(f"Worker {worker_id}: job {job[:2]} blocked: {e}")
+                except asyncio.TimeoutError:
+                    self.timed_out += 1
+                    logger.warning(f"Worker {worker_id}: job {job[:2]} timed out after {self.tag_timeout}s")
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"Worker {worker_id}: job {job[:2]} failed: {e}", exc_info=True)
+                finally:
+                    self.in_flight -= 1
+                    busy = time.monotonic() - started
+                    self._busy_seconds += busy
+                    if session is not None:
+                        await self.sessions.release(session, busy)
+                    logger.debug(f"Scheduler: {self.stats()}")
+
+        self._deadline = self._started_at + self.run_timeout if self.run_timeout is not None else None
+        self._workers = [asyncio.create_task(run_worker(i)) for i in range(min(self.concurrency, len(jobs)))]
+        try:
+            await asyncio.gather(*self._workers)
+        finally:
+            self.cancel()
+            self._workers = []
+        logger.info(f"Scheduler finished: {self.stats()}")
+        return results
+
+    def _acquire_timeout(self) -> float | None:
+        # A job waits for a session at most tag_timeout, and never past the run deadline
+        limits = [limit for limit in (self.tag_timeout, self._deadline - time.monotonic() if self._deadline is not None else None) if limit is not None]
+        return max(min(limits), 0.0) if limits else None
+
+    def cancel(self) -> None:
+        for task in self._workers:
+            if not task.done():
+                task.cancel()
+
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        capacity = elapsed * self.concurrency
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "timed_out": self.timed_out,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "failovers": self.failovers,
+            "utilisation": round(self._busy_seconds / capacity, 3) if capacity else 0.0,
+            "elapsed_seconds": round(elapsed, 1),
+        }
@@ -0,0 +1,178 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import path configuration
+from config.path_config import AUTH_TWITTER
+# Import request blocking policy
+from src.backend.scraping.resource_policy import ResourcePolicy
+# Import offline record/replay hooks
+from src.backend.scraping.replay import apply_har, HAR_MODES
+
+logger = LoggingConfig(level="DEBUG", level_console="DEBUG").get_logger()
+
+@dataclass
+class PooledPage:
+    browser_index: int
+    context: BrowserContext
+    page: Page
+    navigations: int = 0
+    # Set when a lease raised; the page is replaced before it is handed out again
+    broken: bool = False
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: int = 3,
+        pages_per_browser: int = 1,
+        max_navigations: int = 20,
+        headless: bool = True,
+        storage_state: str | Path | None = AUTH_TWITTER,
+        viewport: dict | None = None,
+        health_check_timeout: float = 5.0,
+        resource_policy: ResourcePolicy | None = None,
+        har_dir: str | Path | None = None,
+        har_mode: str = "replay",
+        context_hook=None,
+    ):
+        if har_dir is not None and har_mode not in HAR_MODES:
+            raise ValueError(f"Unknown HAR mode: {har_mode} (expected one of {', '.join(HAR_MODES)})")
+        self.size = size
+        self.pages_per_browser = pages_per_browser
+        self.max_navigations = max_navigations
+        self.headless = headless
+        self.storage_state = storage_state
+        self.viewport = viewport or {"width": 1280, "height": 1024}
+        self.health_check_timeout = health_check_timeout
+        self.resource_policy = resource_policy
+        self.har_dir = har_dir
+        self.har_mode = har_mode
+        # Optional async callable run on every new context, e.g. SnapshotReplay.apply
+        self.context_hook = context_hook
+        self._contexts_created = 0
+
+        self._playwright = None
+        self._browsers: list[Browser | None] = []
+        self._idle: asyncio.Queue[PooledPage] = asyncio.Queue()
+        self._leased: set[int] = set()
+        self._browser_locks: list[asyncio.Lock] = []
+        self._started = False
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        if self._started:
+            return
+        self._playwright = await async_playwright().start()
+        self._browsers = [None] * self.size
+        self._browser_locks = [asyncio.Lock() for _ in range(self.size)]
+        for browser_index in range(self.size):
+            for _ in range(self.pages_per_browser):
+                self._idle.put_nowait(await self._new_page(browser_index))
+        self._started = True
+        logger.info(f"Browser pool started with {self.size} browsers x {self.pages_per_browser} pages")
+
+    async def close(self) -> None:
+        if not self._started:
+            return
+        self._started = False
+        for browser in self._browsers:
+            if browser is not None and browser.is_connected():
+                try:
+                    await browser.close()
+                except Exception as e:
+                    logger.warning(f"Failed to close browser cleanly: {e}")
+        self._browsers = []
+        self._idle = asyncio.Queue()
+        self._leased.clear()
+        await self._playwright.stop()
+        self._playwright = None
+        if self.resource_policy is not None:
+            logger.info(f"Resource policy: {self.resource_policy.stats()}")
+        logger.info("Browser pool closed")
+
+    @asynccontextmanager
+    async def lease(self):
+        if not self._started:
+            raise RuntimeError("BrowserPool is not started")
+        pooled = await self._idle.get()
+        try:
+            if pooled.broken:
+                pooled = await self._recycle(pooled, reason="error during previous lease")
+            elif not await self._is_healthy(pooled):
+                pooled = await self._recycle(pooled, reason="failed health check")
+            self._leased.add(id(pooled))
+            pooled.navigations += 1
+            yield pooled.page
+        except BaseException:
+            # Any exception can leave the page mid-navigation or with dialogs open, so it is never reused
+            pooled.broken = True
+            raise
+        finally:
+            self._leased.discard(id(pooled))
+            if self._started:
+                if pooled.broken or pooled.navigations >= self.max_navigations:
+                    reason = "error during lease" if pooled.broken else f"{pooled.navigations} navigations"
+                    try:
+                        pooled = await self._recycle(pooled, reason=reason)
+                    except Exception as e:
+                        # Stays marked broken, so the next lease retries the recycle before using it
+                        logger.error(f"Failed to recycle page on browser {pooled.browser_index}: {e}", exc_info=True)
+                self._idle.put_nowait(pooled)
+
+    @property
+    def in_use(self) -> int:
+        return len(self._leased)
+
+    async def _launch_browser(self, browser_index: int) -> Browser:
+        async with self._browser_locks[browser_index]:
+            browser = self._browsers[browser_index]
+            if browser is None or not browser.is_connected():
+                browser = await self._playwright.chromium.launch(headless=self.headless)
+                self._browsers[browser_index] = browser
+                logger.debug(f"Launched browser {browser_index}")
+            return browser
+
+    async def _new_page(self, browser_index: int) -> PooledPage:
+        browser = await self._launch_browser(browser_index)
+        context = await browser.new_context(
+            storage_state=self.storage_state,
+            viewport=self.viewport,
+        )
+        if self.resource_policy is not None:
+            await self.resource_policy.apply(context)
+        if self.har_dir is not None:
+            await apply_har(context, self.har_dir, self.har_mode, self._contexts_created)
+        if self.context_hook is not None:
+            await self.context_hook(context)
+        self._contexts_created += 1
+        page = await context.new_page()
+        return PooledPage(browser_index=browser_index, context=context, page=page)
+
+    async def _is_healthy(self, pooled: PooledPage) -> bool:
+        browser = self._browsers[pooled.browser_index]
+        if browser is None or not browser.is_connected() or pooled.page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(pooled.page.evaluate("1"), timeout=self.health_check_timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"Health check failed on browser {pooled.browser_index}: {e}")
+            return False
+
+    async def _recycle(self, pooled: PooledPage, reason: str) -> PooledPage:
+        logger.debug(f"Recycling page on browser {pooled.browser_index} ({reason})")
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logger.debug(f"Context already closed on browser {pooled.browser_index}: {e}")
+        return await self._new_page(pooled.browser_index)
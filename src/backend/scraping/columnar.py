@@ -0,0 +1,131 @@
+from array import array
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+EPOCH = datetime(1970, 1, 1)
+
+def to_epoch_ns(value: datetime | str) -> int:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    delta = value - EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1_000
+
+class TweetColumns:
+    # Few distinct values: stored once, rows hold int32 codes
+    DICTIONARY_FIELDS = ("category", "tag")
+    STRING_FIELDS = ("tweetId", "username", "tweetText")
+    COLUMN_ORDER = ("category", "tag", "categories", "tags", "tweetId", "username", "tweetText", "postTimeRaw", "scrapeTime")
+
+    def __init__(self):
+        self._dictionaries: dict[str, dict[str, int]] = {field: {} for field in self.DICTIONARY_FIELDS}
+        self._codes: dict[str, array] = {field: array("i") for field in self.DICTIONARY_FIELDS}
+        # tags/categories share the tag/category dictionaries; offsets delimit each row's list
+        self._list_codes: dict[str, array] = {field: array("i") for field in self.DICTIONARY_FIELDS}
+        self._list_offsets: dict[str, array] = {field: array("i", [0]) for field in self.DICTIONARY_FIELDS}
+        self._strings: dict[str, list] = {field: [] for field in self.STRING_FIELDS}
+        self._post_time = array("q")
+        self._scrape_time = array("q")
+
+    def __len__(self) -> int:
+        return len(self._post_time)
+
+    @classmethod
+    def from_records(cls, records: list[dict]) -> "TweetColumns":
+        columns = cls()
+        columns.extend(records)
+        return columns
+
+    def _encode(self, field: str, value: str) -> int:
+        dictionary = self._dictionaries[field]
+        code = dictionary.get(value)
+        if code is None:
+            code = dictionary[value] = len(dictionary)
+        return code
+
+    def append(self, record: dict) -> None:
+        for field, list_field in (("category", "categories"), ("tag", "tags")):
+            self._codes[field].append(self._encode(field, record[field]))
+            values = record.get(list_field) or [record[field]]
+            self._list_codes[field].extend(self._encode(field, value) for value in values)
+            self._list_offsets[field].append(len(self._list_codes[field]))
+        for field in self.STRING_FIELDS:
+            self._strings[field].append(record.get(field))
+        self._post_time.append(to_epoch_ns(record["postTimeRaw"]))
+        self._scrape_time.append(to_epoch_ns(record["scrapeTime"]))
+
+    def _encode_many(self, field: str, values: list[str]) -> np.ndarray:
+        # factorize in C, then map the batch's local codes onto the running dictionary
+        local_codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        mapping = np.array([self._encode(field, value) for value in uniques], dtype=np.int32)
+        return mapping[local_codes] if len(mapping) else local_codes.astype(np.int32)
+
+    def extend(self, records: list[dict]) -> None:
+        # Column at a time with vectorised encoding instead of one append call per record
+        if not records:
+            return
+        for field, list_field in (("category", "categories"), ("tag", "tags")):
+            self._codes[field].frombytes(self._encode_many(field, [record[field] for record in records]).tobytes())
+            lists = [record.get(list_field) or [record[field]] for record in records]
+            lengths = np.fromiter(map(len, lists), dtype=np.int32, count=len(lists))
+            flat = [value for values in lists for value in values]
+            self._list_codes[field].frombytes(self._encode_many(field, flat).tobytes())
+            offsets = self._list_offsets[field][-1] + np.cumsum(lengths, dtype=np.int32)
+            self._list_offsets[field].frombytes(offsets.tobytes())
+        for field in self.STRING_FIELDS:
+            self._strings[field].extend([record.get(field) for record in records])
+        post_times = pd.DatetimeIndex([record["postTimeRaw"] for record in records]).as_unit("ns")
+        self._post_time.frombytes(post_times.asi8.tobytes())
+        scrape_times = np.array([record["scrapeTime"] for record in records], dtype="datetime64[ns]")
+        self._scrape_time.frombytes(scrape_times.view(np.int64).tobytes())
+
+    def _categories(self, field: str) -> list[str]:
+        # Codes are assigned in insertion order, so dict order is code order
+        return list(self._dictionaries[field])
+
+    def _timestamps(self, values: array) -> np.ndarray:
+        # View over the int64 buffer, no copy
+        return np.frombuffer(values, dtype=np.int64).view("datetime64[ns]")
+
+    def _lists(self, field: str) -> list[list[str]]:
+        codes = np.frombuffer(self._list_codes[field], dtype=np.int32)
+        values = np.asarray(self._categories(field), dtype=object)[codes].tolist()
+        offsets = self._list_offsets[field]
+        return [values[start:end] for start, end in zip(offsets, offsets[1:])]
+
+    def to_pandas(self) -> pd.DataFrame:
+        post_time = pd.DatetimeIndex(self._timestamps(self._post_time))
+        columns = {
+            "category": pd.Categorical.from_codes(np.frombuffer(self._codes["category"], dtype=np.int32), categories=self._categories("category")),
+            "tag": pd.Categorical.from_codes(np.frombuffer(self._codes["tag"], dtype=np.int32), categories=self._categories("tag")),
+            "categories": self._lists("category"),
+            "tags": self._lists("tag"),
+            "tweetId": pd.array(self._strings["tweetId"], dtype="string"),
+            "username": pd.array(self._strings["username"], dtype="string"),
+            "tweetText": pd.array(self._strings["tweetText"], dtype="string"),
+            "postTimeRaw": post_time,
+            "scrapeTime": self._timestamps(self._scrape_time),
+            "year": post_time.year,
+            "month": post_time.month,
+            "day": post_time.day,
+        }
+        return pd.DataFrame(columns, copy=False)
+
+    def to_arrow(self) -> pa.Table:
+        post_time = pa.array(self._timestamps(self._post_time), type=pa.timestamp("ns"))
+        arrays = {}
+        for field, list_field in (("category", "categories"), ("tag", "tags")):
+            dictionary = pa.array(self._categories(field), type=pa.string())
+            arrays[field] = pa.DictionaryArray.from_arrays(pa.array(self._codes[field], type=pa.int32()), dictionary)
+            list_values = pa.DictionaryArray.from_arrays(pa.array(self._list_codes[field], type=pa.int32()), dictionary)
+            arrays[list_field] = pa.ListArray.from_arrays(pa.array(self._list_offsets[field], type=pa.int32()), list_values)
+        for field in self.STRING_FIELDS:
+            arrays[field] = pa.array(self._strings[field], type=pa.string())
+        arrays["postTimeRaw"] = post_time
+        arrays["scrapeTime"] = pa.array(self._timestamps(self._scrape_time), type=pa.timestamp("ns"))
+        table = pa.table({name: arrays[name] for name in self.COLUMN_ORDER})
+        for name, part in (("year", pc.year), ("month", pc.month), ("day", pc.day)):
+            table = table.append_column(name, part(post_time))
+        return table
@@ -0,0 +1,66 @@
+from collections import Counter
+from typing import Callable
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import scraper metrics
+from src.backend.scraping.metrics import DUPLICATES
+
+logger = LoggingConfig(level="DEBUG", level_console="DEBUG").get_logger()
+
+class DedupRegistry:
+    def __init__(self, on_merge: Callable[[dict], None] | None = None):
+        # A key maps to None once its record has been flushed downstream
+        self._records: dict[tuple, dict | None] = {}
+        # Called with the owner record whenever another tag's tags/categories were added to it
+        self.on_merge = on_merge
+        self.merged = 0
+        # Duplicates per tag that found them: those tweets were new to the tag, just stored under another one
+        self.merged_by_tag: Counter = Counter()
+        self.released = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._records
+
+    def claim(self, key: tuple, record: dict) -> bool:
+        # All tag tasks run on one event loop, so check-and-set needs no lock
+        if key not in self._records:
+            self._records[key] = record
+            return True
+
+        owner = self._records[key]
+        self.merged += 1
+        self.merged_by_tag[record["tag"]] += 1
+        DUPLICATES.labels(category=record["category"], tag=record["tag"]).inc()
+        if owner is None:
+            # Already written out, so the extra tag can no longer be attached
+            logger.debug(f"Tweet already flushed, dropped duplicate from {record['tag']}")
+            return False
+        changed = False
+        for field, value in (("tags", record["tag"]), ("categories", record["category"])):
+            if value not in owner[field]:
+                owner[field].append(value)
+                changed = True
+        if changed and self.on_merge is not None:
+            self.on_merge(owner)
+        logger.debug(f"Tweet already claimed by {owner['tag']}, added {record['tag']}")
+        return False
+
+    def preload(self, keys) -> None:
+        # Keys written out by an earlier run: reject them without holding a record
+        for key in keys:
+            self._records.setdefault(key, None)
+
+    def release(self, records: list[dict]) -> None:
+        # Keep the keys so later duplicates are still rejected, but drop the record bodies
+        for record in records:
+            key = (record["username"], record["tweetText"])
+            if self._records.get(key) is not None:
+                self._records[key] = None
+                self.released += 1
+
+    def stats(self) -> dict:
+        return {"unique_tweets": len(self._records), "cross_tag_duplicates": self.merged, "released": self.released}
@@ -0,0 +1,60 @@
+import os
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, push_to_gateway, start_http_server
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+# Own registry so only scraper metrics are pushed, not the Python process defaults
+REGISTRY = CollectorRegistry()
+LABELS = ("category", "tag")
+
+PAGES_LOADED = Counter("x_scraper_pages_loaded_total", "Search pages navigated to", LABELS, registry=REGISTRY)
+SCROLLS = Counter("x_scraper_scrolls_total", "Scroll steps completed", LABELS, registry=REGISTRY)
+SCROLL_SECONDS = Histogram(
+    "x_scraper_scroll_seconds",
+    "Time from scroll to extracted tweets, excluding pacing delay",
+    LABELS,
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 40, 60, 120),
+    registry=REGISTRY,
+)
+PACING_SECONDS = Counter("x_scraper_pacing_seconds_total", "Time spent in deliberate pacing delays", LABELS, registry=REGISTRY)
+ARTICLES_SEEN = Counter("x_scraper_articles_seen_total", "Articles or timeline entries looked at", LABELS, registry=REGISTRY)
+TWEETS_EXTRACTED = Counter("x_scraper_tweets_extracted_total", "New tweets handed downstream", LABELS, registry=REGISTRY)
+DUPLICATES = Counter("x_scraper_cross_tag_duplicates_total", "Tweets already claimed by another tag", LABELS, registry=REGISTRY)
+BLOCKS = Counter("x_scraper_block_events_total", "Loads where X served no articles after retries", LABELS, registry=REGISTRY)
+TWEETS_PER_SECOND = Gauge("x_scraper_tweets_per_second", "Extracted tweets per second over the last run of a tag", LABELS, registry=REGISTRY)
+TAG_SECONDS = Histogram(
+    "x_scraper_tag_seconds",
+    "Wall time to scrape one tag",
+    LABELS,
+    buckets=(5, 15, 30, 60, 120, 300, 600, 1200, 2700),
+    registry=REGISTRY,
+)
+
+_server_started = False
+
+def start_metrics_server(port: int | None = None) -> bool:
+    # Only when METRICS_PORT (or a port) is given, so several flow processes don't fight over one port
+    global _server_started
+    port = port or int(os.getenv("METRICS_PORT", "0"))
+    if _server_started or not port:
+        return _server_started
+    start_http_server(port, registry=REGISTRY)
+    _server_started = True
+    logger.info(f"Serving scraper metrics on :{port}/metrics")
+    return True
+
+def push_metrics(job: str, gateway: str | None = None) -> bool:
+    gateway = gateway or os.getenv("PUSHGATEWAY_URL")
+    if not gateway:
+        return False
+    try:
+        push_to_gateway(gateway, job=job, registry=REGISTRY)
+        logger.info(f"Pushed scraper metrics to {gateway} as job {job}")
+        return True
+    except Exception as e:
+        # Metrics must never fail a scrape run
+        logger.warning(f"Could not push metrics to {gateway}: {e}")
+        return False
@@ -0,0 +1,87 @@
+import asyncio
+import random
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+
+logger = LoggingConfig(level="DEBUG", level_console="DEBUG").get_logger()
+
+class SessionBlockedError(Exception):
+    # Raised when X stops serving a logged-in session, so the caller can move the work to another one
+    pass
+
+class SessionUnavailableError(Exception):
+    # Raised when no session can take a job before the caller's deadline (e.g. the only account is cooling down)
+    pass
+
+class AdaptivePacer:
+    def __init__(
+        self,
+        initial_rate: float = 2.4,
+        min_rate: float = 1.0,
+        max_rate: float = 8.0,
+        increase: float = 0.4,
+        backoff: float = 0.5,
+        block_backoff: float = 0.25,
+        jitter: float = 0.25,
+    ):
+        # Rates are page loads per minute; 2.4/min is the old fixed ~25 s per scroll
+        if not 0 < min_rate <= initial_rate <= max_rate:
+            raise ValueError("Expected 0 < min_rate <= initial_rate <= max_rate")
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.backoff = backoff
+        self.block_backoff = block_backoff
+        self.jitter = jitter
+
+        self.rate = initial_rate
+        # Loop time of the last reserved page-load slot; shared by every tag on the session
+        self._last_slot = float("-inf")
+        self.successes = 0
+        self.empties = 0
+        self.blocks = 0
+        self.waited_seconds = 0.0
+
+    @property
+    def delay(self) -> float:
+        return 60.0 / self.rate
+
+    async def wait(self) -> float:
+        # Concurrent tags on one session take consecutive slots, so the session as a whole loads
+        # at most `rate` pages per minute instead of rate x concurrency
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._last_slot + self.delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+        self._last_slot = slot
+        delay = slot - now
+        self.waited_seconds += delay
+        await asyncio.sleep(delay)
+        return delay
+
+    def record_success(self) -> None:
+        self.successes += 1
+        self._set_rate(self.rate + self.increase, "clean load")
+
+    def record_empty(self) -> None:
+        self.empties += 1
+        self._set_rate(self.rate * self.backoff, "empty load")
+
+    def record_block(self) -> None:
+        self.blocks += 1
+        self._set_rate(self.rate * self.block_backoff, "block detected")
+
+    def stats(self) -> dict:
+        return {
+            "rate_per_minute": round(self.rate, 3),
+            "delay_seconds": round(self.delay, 2),
+            "successes": self.successes,
+            "empties": self.empties,
+            "blocks": self.blocks,
+            "waited_seconds": round(self.waited_seconds, 1),
+        }
+
+    def _set_rate(self, rate: float, reason: str) -> None:
+        previous = self.rate
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        if self.rate != previous:
+            logger.debug(f"Pacing {reason}: {previous:.2f} -> {self.rate:.2f} loads/min ({self.delay:.1f}s delay)")
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import path configuration
+from config.path_config import RECORDINGS_DIR
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+HAR_MODES = ("record", "replay")
+
+def slugify_tag(tag: str) -> str:
+    return re.sub(r"[^\w]+", "_", tag, flags=re.UNICODE).strip("_") or "tag"
+
+async def apply_har(context, har_dir: str | Path, mode: str, index: int) -> Path | None:
+    har_dir = Path(har_dir)
+    if mode == "record":
+        # One HAR per context: Playwright writes it when the context closes
+        har_dir.mkdir(parents=True, exist_ok=True)
+        har_path = har_dir / f"context-{index:04d}.har"
+        await context.route_from_har(har_path, update=True, update_content="embed", update_mode="minimal", not_found="fallback")
+        logger.debug(f"Recording HAR to {har_path}")
+        return har_path
+    if mode == "replay":
+        har_files = sorted(har_dir.glob("*.har"))
+        if not har_files:
+            raise FileNotFoundError(f"No HAR recordings found in {har_dir}")
+        # Routes run newest-first, so this catch-all only sees what no recording matched
+        # and nothing reaches the live site
+        await context.route("**/*", lambda route: route.abort("blockedbyclient"))
+        for har_path in har_files:
+            await context.route_from_har(har_path, not_found="fallback")
+        return None
+    raise ValueError(f"Unknown HAR mode: {mode} (expected one of {', '.join(HAR_MODES)})")
+
+async def save_snapshot(page, snapshot_dir: str | Path, tag: str, scroll: int) -> Path:
+    target = Path(snapshot_dir) / slugify_tag(tag)
+    target.mkdir(parents=True, exist_ok=True)
+    path = target / f"scroll_{scroll:03d}.html"
+    path.write_text(await page.content(), encoding="utf-8")
+    return path
+
+class SnapshotReplay:
+    def __init__(self, pages: dict[str, str]):
+        # Maps a search query ("#TCAS") to the HTML served for it
+        self.pages = pages
+        self.served = 0
+
+    @classmethod
+    def from_dir(cls, snapshot_dir: str | Path) -> "SnapshotReplay":
+        pages = {}
+        for tag_dir in Path(snapshot_dir).iterdir():
+            snapshots = sorted(tag_dir.glob("scroll_*.html"))
+            if snapshots:
+                # The last snapshot holds the most articles for that tag
+                pages[tag_dir.name] = snapshots[-1].read_text(encoding="utf-8")
+        return cls(pages)
+
+    async def apply(self, context) -> None:
+        await context.route("**/*", self._handle)
+
+    async def _handle(self, route) -> None:
+        url = route.request.url
+        if route.request.resource_type == "document" and "/search?" in url:
+            query = parse_qs(urlparse(url).query).get("q", [""])[0]
+            html = self.pages.get(query) or self.pages.get(slugify_tag(query))
+            if html is not None:
+                self.served += 1
+                await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=html)
+                return
+        await route.abort("blockedbyclient")
+
+def build_synthetic_search_page(tag: str, total_articles: int, per_scroll: int = 20, dom_window: int = 60, seed_time: datetime | None = None) -> str:
+    # Mirrors the x.com article markup extract_articles relies on, with infinite scroll and DOM recycling
+    seed_time = seed_time or datetime(2025, 5, 14, 12, 0, 0)
+    tweets = []
+    for i in range(total_articles):
+        posted = seed_time - timedelta(minutes=7 * i)
+        tweets.append({
+            "user": f"user_{i % 97}",
+            "id": str(1922000000000000000 - i),
+            "text": f"ข้อความทดสอบ {i} {tag} " + "lorem ipsum " * (i % 5),
+            "time": posted.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        })
+    payload = json.dumps(tweets, ensure_ascii=False)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><style>article {{ display: block; min-height: 300px; }}</style></head>
+<body><main id="timeline"></main>
+<script>
+const tweets = {payload};
+const perScroll = {per_scroll};
+const domWindow = {dom_window};
+let rendered = 0;
+let removedHeight = 0;
+function render(t) {{
+    const article = document.createElement("article");
+    article.innerHTML =
+        '<div data-testid="User-Name"><span>Display ' + t.user + '</span><span>✓</span>' +
+        '<span>@' + t.user + '</span><span>·</span>' +
+        '<a href="/' + t.user + '/status/' + t.id + '"><time datetime="' + t.time + '">now</time></a></div>' +
+        '<div data-testid="tweetText"></div>';
+    article.querySelector("[data-testid='tweetText']").textContent = t.text;
+    return article;
+}}
+function loadMore() {{
+    const timeline = document.getElementById("timeline");
+    const chunk = tweets.slice(rendered, rendered + perScroll);
+    chunk.forEach((t) => timeline.appendChild(render(t)));
+    rendered += chunk.length;
+    while (timeline.children.length > domWindow) {{
+        removedHeight += timeline.firstElementChild.offsetHeight;
+        timeline.firstElementChild.remove();
+    }}
+    timeline.style.paddingTop = removedHeight + "px";
+}}
+loadMore();
+window.addEventListener("scroll", () => {{
+    if (window.scrollY + window.innerHeight >= document.body.scrollHeight - 4000) loadMore();
+}});
+</script></body></html>"""
+
+async def record(tags: list[str], max_scrolls: int = 3, output_dir: str | Path = RECORDINGS_DIR) -> None:
+    from src.backend.scraping.browser_pool import BrowserPool
+    from src.backend.scraping.x_scraping import XScraping
+
+    output_dir = Path(output_dir)
+    x_scraping = XScraping()
+    tag_urls = x_scraping.encode_tag_to_url({"recording": tags})["recording"]
+    async with BrowserPool(size=1, har_dir=output_dir / "har", har_mode="record") as pool:
+        for tag, url in tag_urls.items():
+            await x_scraping.scrape_all_tweet_texts("recording", tag, url, max_scrolls=max_scrolls, pool=pool, snapshot_dir=output_dir / "html")
+    logger.info(f"Saved recordings to {output_dir}")
+
+if __name__ == "__main__":
+    # python src/backend/scraping/replay.py "#TCAS" "#มธ"
+    asyncio.run(record(sys.argv[1:] or ["#TCAS"]))
@@ -0,0 +1,98 @@
+from collections import Counter
+from urllib.parse import urlparse
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+
+logger = LoggingConfig(level="DEBUG", level_console="DEBUG").get_logger()
+
+BLOCKABLE_RESOURCE_TYPES = ("image", "media", "font")
+
+ANALYTICS_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "ads-twitter.com",
+    "ads-api.x.com",
+    "analytics.twitter.com",
+    "analytics.x.com",
+)
+ANALYTICS_PATHS = ("/jot/", "/client_event", "/scribe")
+
+# Typical transfer sizes on x.com search pages, used until real sizes have been observed
+DEFAULT_SIZE_ESTIMATES = {
+    "image": 25_000,
+    "media": 400_000,
+    "font": 40_000,
+    "analytics": 1_500,
+}
+
+class ResourcePolicy:
+    def __init__(
+        self,
+        block_types: tuple[str, ...] = BLOCKABLE_RESOURCE_TYPES,
+        allowlist: dict[str, list[str]] | None = None,
+        block_analytics: bool = True,
+    ):
+        self.block_types = set(block_types)
+        # Per resource type, URL substrings that are still let through (e.g. {"image": ["/emoji/"]})
+        self.allowlist = allowlist or {}
+        self.block_analytics = block_analytics
+
+        self.blocked: Counter[str] = Counter()
+        self.allowed: Counter[str] = Counter()
+        self.bytes_saved = 0
+        self._observed_bytes: Counter[str] = Counter()
+        self._observed_count: Counter[str] = Counter()
+
+    async def apply(self, context) -> None:
+        await context.route("**/*", self._handle)
+        context.on("response", self._observe)
+
+    def classify(self, url: str, resource_type: str) -> str | None:
+        if self.block_analytics:
+            parsed = urlparse(url)
+            if parsed.hostname and parsed.hostname.endswith(ANALYTICS_HOSTS):
+                return "analytics"
+            if any(marker in parsed.path for marker in ANALYTICS_PATHS):
+                return "analytics"
+        if resource_type not in self.block_types:
+            return None
+        if any(pattern in url for pattern in self.allowlist.get(resource_type, [])):
+            return None
+        return resource_type
+
+    def estimated_size(self, kind: str) -> int:
+        if self._observed_count[kind]:
+            return self._observed_bytes[kind] // self._observed_count[kind]
+        return DEFAULT_SIZE_ESTIMATES.get(kind, 0)
+
+    async def _handle(self, route) -> None:
+        request = route.request
+        kind = self.classify(request.url, request.resource_type)
+        if kind is None:
+            self.allowed[request.resource_type] += 1
+            # fallback() lets other routes on the context (e.g. HAR replay) still see the request
+            await route.fallback()
+            return
+        self.blocked[kind] += 1
+        self.bytes_saved += self.estimated_size(kind)
+        await route.abort("blockedbyclient")
+
+    def _observe(self, response) -> None:
+        # Allowlisted responses of a blockable type calibrate the bytes-saved estimate
+        resource_type = response.request.resource_type
+        if resource_type not in self.block_types:
+            return
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self._observed_bytes[resource_type] += int(length)
+            self._observed_count[resource_type] += 1
+
+    def stats(self) -> dict:
+        return {
+            "blocked": dict(self.blocked),
+            "blocked_total": sum(self.blocked.values()),
+            "allowed_total": sum(self.allowed.values()),
+            "estimated_bytes_saved": self.bytes_saved,
+        }
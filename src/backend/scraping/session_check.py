@@ -0,0 +1,155 @@
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+import httpx
+from dotenv import load_dotenv
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import path configuration
+from config.path_config import AUTH_TWITTER, SESSION_STATUS_PATH
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+load_dotenv()
+
+# Cookies a logged-in x.com session cannot work without
+REQUIRED_COOKIES = ("auth_token", "ct0")
+PROBE_URL = "https://api.x.com/1.1/account/settings.json"
+
+@dataclass
+class SessionStatus:
+    # None means the probe could not reach X, so validity is unknown
+    valid: bool | None
+    reason: str
+    checked_at: float
+    expires_at: float | None = None
+
+def web_bearer_token() -> str:
+    # Bearer token of the x.com web client, from .env; the account itself is identified by the cookies
+    token = os.getenv("X_WEB_BEARER_TOKEN")
+    if not token:
+        raise RuntimeError("X_WEB_BEARER_TOKEN is not set; add the x.com web client's bearer token to .env to probe sessions")
+    return token
+
+class SessionValidator:
+    def __init__(self, storage_state: str | Path = AUTH_TWITTER, probe_interval: float = 15 * 60, cache_path: str | Path = SESSION_STATUS_PATH, timeout: float = 10.0):
+        self.storage_state = Path(storage_state)
+        self.probe_interval = probe_interval
+        self.cache_path = Path(cache_path)
+        self.timeout = timeout
+
+    def check(self, force_probe: bool = False) -> SessionStatus:
+        status = self.cookie_status()
+        if status.valid is False:
+            logger.warning(f"Session {self.storage_state.name} invalid: {status.reason}")
+            return status
+
+        cached = None if force_probe else self._cached()
+        if cached is not None:
+            logger.debug(f"Session {self.storage_state.name} from cache: {cached.reason}")
+            return cached
+
+        status = self.probe(status.expires_at)
+        if status.valid is not None:
+            # Unknown results are not cached so the next check tries again
+            self._store(status)
+        log = logger.info if status.valid else logger.warning
+        log(f"Session {self.storage_state.name} probe: {status.reason}")
+        return status
+
+    def _load_state(self) -> dict | None:
+        try:
+            with open(self.storage_state, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _cookies(self, state: dict) -> dict[str, dict]:
+        return {
+            cookie["name"]: cookie
+            for cookie in state.get("cookies", [])
+            if cookie.get("domain", "").lstrip(".") in ("x.com", "twitter.com")
+        }
+
+    def cookie_status(self) -> SessionStatus:
+        now = time.time()
+        state = self._load_state()
+        if state is None:
+            return SessionStatus(False, "storage state missing or unreadable", now)
+        cookies = self._cookies(state)
+        missing = [name for name in REQUIRED_COOKIES if name not in cookies]
+        if missing:
+            return SessionStatus(False, f"missing cookies: {', '.join(missing)}", now)
+        # Playwright stores -1 for cookies without an expiry
+        expiries = [cookies[name].get("expires", -1) for name in REQUIRED_COOKIES]
+        expiries = [expiry for expiry in expiries if expiry and expiry > 0]
+        expires_at = min(expiries) if expiries else None
+        if expires_at is not None and expires_at <= now:
+            return SessionStatus(False, "auth cookies expired", now, expires_at)
+        return SessionStatus(True, "cookies present", now, expires_at)
+
+    def probe(self, expires_at: float | None = None) -> SessionStatus:
+        now = time.time()
+        cookies = self._cookies(self._load_state() or {})
+        headers = {
+            "authorization": f"Bearer {web_bearer_token()}",
+            "x-csrf-token": cookies.get("ct0", {}).get("value", ""),
+            "x-twitter-auth-type": "OAuth2Session",
+            "x-twitter-active-user": "yes",
+        }
+        try:
+            response = httpx.get(
+                PROBE_URL,
+                headers=headers,
+                cookies={name: cookie["value"] for name, cookie in cookies.items()},
+                timeout=self.timeout,
+            )
+        except httpx.HTTPError as e:
+            return SessionStatus(None, f"probe failed: {e}", now, expires_at)
+        if response.status_code == 200:
+            return SessionStatus(True, "probe ok", now, expires_at)
+        if response.status_code in (401, 403):
+            return SessionStatus(False, f"probe rejected ({response.status_code})", now, expires_at)
+        if response.status_code == 429:
+            # Rate limited means X still accepted the cookies
+            return SessionStatus(True, "probe rate limited", now, expires_at)
+        return SessionStatus(None, f"probe returned {response.status_code}", now, expires_at)
+
+    def _fingerprint(self) -> str:
+        # A fresh login rewrites the file, which invalidates the cached result
+        stat = self.storage_state.stat()
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _read_cache(self) -> dict:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _cached(self) -> SessionStatus | None:
+        entry = self._read_cache().get(str(self.storage_state))
+        if not entry or entry.get("fingerprint") != self._fingerprint():
+            return None
+        status = SessionStatus(**entry["status"])
+        if time.time() - status.checked_at > self.probe_interval:
+            return None
+        return status
+
+    def _store(self, status: SessionStatus) -> None:
+        cache = self._read_cache()
+        cache[str(self.storage_state)] = {"fingerprint": self._fingerprint(), "status": asdict(status)}
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_path.parent, prefix=".session-status-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,163 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import path configuration
+from config.path_config import AUTH_TWITTER, SESSIONS_DIR
+# Import browser pool
+from src.backend.scraping.browser_pool import BrowserPool
+# Import adaptive scroll pacing
+from src.backend.scraping.pacing import AdaptivePacer, SessionUnavailableError
+# Import cached session validity check
+from src.backend.scraping.session_check import SessionValidator
+# Import navigation rate limiting
+from src.backend.pipeline.tag_scheduler import TokenBucket
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+@dataclass
+class XSession:
+    name: str
+    storage_state: Path
+    bucket: TokenBucket
+    pacer: AdaptivePacer
+    pool: BrowserPool | None = None
+    in_flight: int = 0
+    cooldown_until: float = 0.0
+    consecutive_blocks: int = 0
+    blocks: int = 0
+    completed: int = 0
+    busy_seconds: float = field(default=0.0, repr=False)
+
+    @property
+    def cooling(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+class SessionRegistry:
+    def __init__(
+        self,
+        storage_states: list[str | Path],
+        concurrency_per_session: int = 3,
+        navigations_per_minute: float = 6.0,
+        cooldown: float = 15 * 60,
+        max_cooldown: float = 4 * 60 * 60,
+        pool_options: dict | None = None,
+    ):
+        if not storage_states:
+            raise ValueError("SessionRegistry needs at least one auth state file")
+        self.concurrency_per_session = concurrency_per_session
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.pool_options = pool_options or {}
+        # Each account gets its own navigation budget and pacer; X rate-limits per account
+        self.sessions = [
+            XSession(
+                name=Path(state).stem,
+                storage_state=Path(state),
+                bucket=TokenBucket(navigations_per_minute, capacity=concurrency_per_session),
+                pacer=AdaptivePacer(),
+            )
+            for state in storage_states
+        ]
+        self._changed = asyncio.Condition()
+
+    @classmethod
+    def from_dir(cls, sessions_dir: str | Path = SESSIONS_DIR, fallback: str | Path | None = AUTH_TWITTER, validate: bool = True, **kwargs) -> "SessionRegistry":
+        storage_states = sorted(Path(sessions_dir).glob("*.json")) if Path(sessions_dir).is_dir() else []
+        if not storage_states and fallback is not None and Path(fallback).exists():
+            storage_states = [Path(fallback)]
+        if validate:
+            # Cheap cookie/probe check so no browser is launched for a logged-out account
+            storage_states = [state for state in storage_states if SessionValidator(state).check().valid is not False]
+            if not storage_states:
+                raise RuntimeError("No valid X session found; log in again with src/backend/scraping/x_login.py")
+        logger.info(f"Loaded {len(storage_states)} X session(s): {', '.join(Path(s).stem for s in storage_states)}")
+        return cls(storage_states, **kwargs)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.sessions) * self.concurrency_per_session
+
+    async def __aenter__(self) -> "SessionRegistry":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        for session in self.sessions:
+            if session.pool is None:
+                session.pool = BrowserPool(size=self.concurrency_per_session, storage_state=session.storage_state, **self.pool_options)
+                await session.pool.start()
+
+    async def close(self) -> None:
+        for session in self.sessions:
+            if session.pool is not None:
+                await session.pool.close()
+                session.pool = None
+        logger.info(f"Sessions: {self.stats()}")
+
+    def _pick(self) -> XSession | None:
+        candidates = [s for s in self.sessions if not s.cooling and s.in_flight < self.concurrency_per_session]
+        if not candidates:
+            return None
+        # Least loaded first, then the one with the most navigation budget left
+        return min(candidates, key=lambda s: (s.in_flight, -s.bucket.tokens))
+
+    async def acquire(self, timeout: float | None = None) -> XSession:
+        # With a timeout, give up instead of waiting out a cooldown that ends after it
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        async with self._changed:
+            while True:
+                session = self._pick()
+                if session is not None:
+                    session.in_flight += 1
+                    break
+                now = time.monotonic()
+                cooling = [s.cooldown_until for s in self.sessions if s.cooling]
+                if deadline is not None and (now >= deadline or (len(cooling) == len(self.sessions) and min(cooling) > deadline)):
+                    raise SessionUnavailableError(f"No X session available within {timeout:.0f}s: {self.stats()}")
+                # Wake up on a release, when the first cooldown runs out, or at the deadline
+                wake_at = [t for t in (min(cooling) if cooling else None, deadline) if t is not None]
+                wait = max(min(wake_at) - now, 0.1) if wake_at else None
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        await session.bucket.acquire()
+        return session
+
+    async def release(self, session: XSession, busy_seconds: float = 0.0) -> None:
+        async with self._changed:
+            session.in_flight -= 1
+            session.busy_seconds += busy_seconds
+            self._changed.notify_all()
+
+    def report_success(self, session: XSession) -> None:
+        session.completed += 1
+        session.consecutive_blocks = 0
+
+    def report_block(self, session: XSession) -> None:
+        session.blocks += 1
+        session.consecutive_blocks += 1
+        cooldown = min(self.cooldown * 2 ** (session.consecutive_blocks - 1), self.max_cooldown)
+        session.cooldown_until = time.monotonic() + cooldown
+        logger.warning(f"Session {session.name} blocked ({session.consecutive_blocks} in a row), cooling down for {cooldown / 60:.0f} min")
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            session.name: {
+                "in_flight": session.in_flight,
+                "completed": session.completed,
+                "blocks": session.blocks,
+                "cooldown_seconds": round(max(session.cooldown_until - now, 0), 1),
+                "busy_seconds": round(session.busy_seconds, 1),
+                "pacing_rate_per_minute": round(session.pacer.rate, 3),
+            }
+            for session in self.sessions
+        }
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+# Import path configuration
+from config.path_config import WATERMARK_PATH
+
+logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
+
+@dataclass
+class Watermark:
+    postTimeRaw: datetime | None = None
+    tweetId: int | None = None
+
+    def covers(self, post_time: datetime, tweet_id: str | int | None = None) -> bool:
+        # Status ids are time-ordered snowflakes, so prefer them over minute-resolution timestamps
+        if self.tweetId is not None and tweet_id:
+            return int(tweet_id) <= self.tweetId
+        if self.postTimeRaw is not None:
+            return post_time <= self.postTimeRaw
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "postTimeRaw": self.postTimeRaw.isoformat() if self.postTimeRaw else None,
+            "tweetId": str(self.tweetId) if self.tweetId is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Watermark":
+        post_time = data.get("postTimeRaw")
+        tweet_id = data.get("tweetId")
+        return cls(
+            postTimeRaw=datetime.fromisoformat(post_time) if post_time else None,
+            tweetId=int(tweet_id) if tweet_id else None,
+        )
+
+class WatermarkStore:
+    def __init__(self, path: str | Path = WATERMARK_PATH):
+        self.path = Path(path)
+
+    def load(self) -> dict[str, Watermark]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read watermarks from {self.path}: {e}")
+            return {}
+        return {tag: Watermark.from_dict(value) for tag, value in raw.items()}
+
+    def advance(self, data: pd.DataFrame) -> dict[str, Watermark]:
+        watermarks = self.load()
+        if data.empty:
+            return watermarks
+
+        # A multi-tag tweet was seen by every tag in its list, so it advances all of them
+        tag_column = "tags" if "tags" in data.columns else "tag"
+        rows = data.explode(tag_column) if tag_column == "tags" else data
+        groups = rows.groupby(tag_column)
+        for tag, group in groups:
+            current = watermarks.get(tag, Watermark())
+            newest_time = pd.to_datetime(group["postTimeRaw"]).max().to_pydatetime()
+            newest_id = None
+            if "tweetId" in group.columns:
+                ids = pd.to_numeric(group["tweetId"], errors="coerce").dropna()
+                newest_id = int(ids.max()) if not ids.empty else None
+
+            if current.postTimeRaw is None or newest_time > current.postTimeRaw:
+                current.postTimeRaw = newest_time
+            if newest_id is not None and (current.tweetId is None or newest_id > current.tweetId):
+                current.tweetId = newest_id
+            watermarks[tag] = current
+
+        self._write(watermarks)
+        logger.info(f"Advanced watermarks for {groups.ngroups} tags")
+        return watermarks
+
+    def _write(self, watermarks: dict[str, Watermark]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {tag: watermark.to_dict() for tag, watermark in watermarks.items()}
+        # Write next to the target and rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".watermarks-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
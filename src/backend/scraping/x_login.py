@@ -4,39 +4,26 @@ from rich.text import Text
 from pathlib import Path
 import json
 import os
-import urllib.parse
+import sys
 # Import modern logging configuration
 from config.logging.modern_log import LoggingConfig
 # Import path configuration
-from config.path_config import AUTH_TWITTER
+from config.path_config import AUTH_TWITTER, SESSIONS_DIR
+# Import cached session validity check
+from src.backend.scraping.session_check import SessionValidator
 
 
 logger = LoggingConfig(level="DEBUG").get_logger()
 
-def validate_session(playwright):
-    encoded = urllib.parse.quote("#ธรรมศาสตร์ช้างเผือก", safe='')
-    url = f"https://x.com/search?q={encoded}&src=typeahead_click&f=live"
-
-    browser = playwright.chromium.launch(headless=True)
-    context = browser.new_context(storage_state=AUTH_TWITTER, viewport={"width": 1280, "height": 1024})
-    page = context.new_page()
-
-    try:
-        page.goto(url)
-        logger.debug("Page loaded. Waiting for initial tweets...")
-        page.wait_for_selector("article")
-        logger.info("Valid session detected.")
+def validate_session(auth_path: str | Path = AUTH_TWITTER, force_probe: bool = False) -> bool:
+    # Cookie check plus a cached HTTP probe; no browser, and the auth file is never deleted
+    status = SessionValidator(auth_path).check(force_probe=force_probe)
+    if status.valid is None:
+        logger.warning(f"Could not confirm session, assuming it still works: {status.reason}")
         return True
-    except Exception as e:
-        logger.error(f"Session invalid or timed out: {e}")
-        if os.path.exists(AUTH_TWITTER):
-            os.remove(AUTH_TWITTER)
-            logger.info("Removed invalid session file")
-        return False
-    finally:
-        browser.close()
-
-def login_and_save_session(playwright):
+    return status.valid
+
+def login_and_save_session(playwright, auth_path: str | Path = AUTH_TWITTER):
     browser = playwright.chromium.launch(headless=False)
     context = browser.new_context()
     page = context.new_page()
@@ -47,13 +34,20 @@ def login_and_save_session(playwright):
     Prompt.ask(Text("Log in to Twitter manually, then press Enter here...", style="bold green"))
 
     # Save session
-    Path(AUTH_TWITTER).parent.mkdir(parents=True, exist_ok=True)
-    context.storage_state(path=AUTH_TWITTER)
+    Path(auth_path).parent.mkdir(parents=True, exist_ok=True)
+    context.storage_state(path=auth_path)
     browser.close()
-    logger.info("Session saved")
+    logger.info(f"Session saved to {auth_path}")
 
 if __name__ == "__main__":
+    # python src/backend/scraping/x_login.py [account] saves an extra session to SESSIONS_DIR/<account>.json
+    auth_path = SESSIONS_DIR / f"{sys.argv[1]}.json" if len(sys.argv) > 1 else AUTH_TWITTER
+    # Probe X directly rather than trusting the cache, so a revoked session is noticed here
+    if validate_session(auth_path, force_probe=True):
+        logger.info(f"Session {auth_path} is still valid, no login needed")
+        sys.exit(0)
     with sync_playwright() as p:
-        # if not os.path.exists(AUTH_TWITTER) or not validate_session(p):
-        login_and_save_session(p)
-            # validate_session(p)
\ No newline at end of file
+        login_and_save_session(p, auth_path)
+    if not validate_session(auth_path, force_probe=True):
+        logger.error(f"Session {auth_path} was saved but X rejected it; log in again")
+        sys.exit(1)
@@ -1,11 +1,12 @@
 import urllib.parse
 import asyncio
-from playwright.async_api import async_playwright
 import time
 from datetime import datetime
 import random
 import pandas as pd
 import os
+from typing import AsyncIterator, Callable
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 # Import modern logging configuration
 from config.logging.modern_log import LoggingConfig
@@ -15,9 +16,48 @@ from config.path_config import AUTH_TWITTER
 from src.backend.validation.validate import ValidationPydantic, TweetData
 # Import LakeFS loader
 from src.backend.load.lakefs_loader import LakeFSLoader
+# Import browser pool
+from src.backend.scraping.browser_pool import BrowserPool
+# Import timeline response capture
+from src.backend.scraping.x_timeline import TimelineCapture, normalize_tweet_text
+# Import per-tag watermark
+from src.backend.scraping.watermark import Watermark
+# Import adaptive scroll pacing
+from src.backend.scraping.pacing import AdaptivePacer, SessionBlockedError
+# Import cross-tag dedup registry
+from src.backend.scraping.dedup import DedupRegistry
+# Import scraper metrics
+from src.backend.scraping.metrics import ARTICLES_SEEN, BLOCKS, PACING_SECONDS, PAGES_LOADED, SCROLL_SECONDS, SCROLLS, TAG_SECONDS, TWEETS_EXTRACTED, TWEETS_PER_SECOND
+# Import columnar record buffer
+from src.backend.scraping.columnar import TweetColumns
+# Import offline snapshot recording
+from src.backend.scraping.replay import save_snapshot
 
 logger = LoggingConfig(level="DEBUG", level_console="DEBUG").get_logger()
 
+SCRAPE_MODES = ("dom", "network")
+
+# Keeps the same span-index rule as extract_articles: spans[2] when there are 4 spans, otherwise spans[3]
+EXTRACT_ARTICLES_JS = """
+() => Array.from(document.querySelectorAll("article")).map((article) => {
+    const displayName = article.querySelector("[data-testid='User-Name']");
+    if (!displayName) return null;
+    const spans = displayName.querySelectorAll("span");
+    const timeTag = displayName.querySelector("time");
+    const tweetTextTag = article.querySelector("[data-testid='tweetText']");
+    if (spans.length <= 3 || !timeTag || !tweetTextTag) return null;
+    const userName = spans.length === 4 ? spans[2].textContent : spans[3].textContent;
+    const link = timeTag.closest("a");
+    const match = link ? (link.getAttribute("href") || "").match(/\\/status\\/(\\d+)/) : null;
+    return {
+        username: (userName || "").trim(),
+        text: (tweetTextTag.textContent || "").trim(),
+        datetime: timeTag.getAttribute("datetime"),
+        statusId: match ? match[1] : null,
+    };
+})
+"""
+
 class XScraping:
     def __init__(self):
         pass
@@ -37,12 +77,19 @@ class XScraping:
         logger.info(f"Encoded tags for {len(tags)} categories to URL format")
         return encoded_tags_by_category
 
-    async def wait_for_articles_with_retry(self, page, max_retries: int =2) -> bool:
+    async def wait_for_articles_with_retry(self, page, max_retries: int =2, pacer: AdaptivePacer | None = None) -> bool:
+        pacer = pacer or AdaptivePacer()
         for retry in range(max_retries):
             if await self.is_article_present(page):
                 return True
+            if await self.is_empty_result(page):
+                # A tag with no results is not a throttling signal, so the rate is left alone
+                logger.info("Search returned no results")
+                return False
             logger.warning(f"Retry {retry+1}/{max_retries} - Waiting before next try...")
-            await asyncio.sleep(random.uniform(10.0, 22.0))
+            await pacer.wait()
+        # One signal per page load: the retries above only wait, the block is recorded once
+        pacer.record_block()
         return False
 
     async def is_article_present(self, page) -> bool:
@@ -50,18 +97,53 @@ class XScraping:
             await page.wait_for_selector("article", timeout=60000)
             logger.debug("Found article on the page")
             return True
-        except TimeoutError as t:
+        except PlaywrightTimeoutError as t:
             logger.error(f"X Blocked us Please try again later 😢")
             await page.screenshot(path="tmp/debug_screenshot_no_tweets.png")
             return False
 
-    async def extract_articles(self, category: str, tag: str, count_tweets: int, articles: list, seen_pairs: set, all_tweet_entries: list) -> None:
+    async def is_empty_result(self, page) -> bool:
+        # A search with no matches renders X's empty state; a blocked session renders nothing
+        return await page.query_selector("[data-testid='emptyState']") is not None
+
+    def _append_entry(self, category: str, tag: str, userName: str, tweetText: str, dateTime: str, tweetId: str | None, seen_pairs: set, all_tweet_entries: list, watermark: Watermark | None = None, dedup: DedupRegistry | None = None) -> bool:
+        if userName and tweetText and dateTime:
+            tweetText = normalize_tweet_text(tweetText)
+            try:
+                dt_naive = datetime.strptime(dateTime, "%Y-%m-%dT%H:%M:%S.%fZ")
+                if watermark and watermark.covers(dt_naive, tweetId):
+                    return True
+                now = datetime.now()
+                key = (userName, tweetText)
+                if key not in seen_pairs:
+                    seen_pairs.add(key)
+                    record = {
+                        "category": category,
+                        "tag": tag,
+                        "categories": [category],
+                        "tags": [tag],
+                        "tweetId": tweetId,
+                        "username": userName,
+                        "tweetText": tweetText,
+                        "postTimeRaw": dt_naive,
+                        "scrapeTime": now.strftime("%Y-%m-%dT%H:%M:%S")
+                    }
+                    # A tweet carrying several tracked hashtags is kept once, by the first tag that saw it
+                    if dedup is not None and not dedup.claim(key, record):
+                        return False
+                    all_tweet_entries.append(record)
+                    logger.debug(f"Scraped tweet {len(all_tweet_entries)} - {tag}")
+            except ValueError as e:
+                logger.error(f"Invalid datetime format: {dateTime} | Error: {e}", exc_info=True)
+        return False
+
+    async def extract_articles(self, category: str, tag: str, count_tweets: int, articles: list, seen_pairs: set, all_tweet_entries: list, watermark: Watermark | None = None, dedup: DedupRegistry | None = None) -> bool:
+        reached_watermark = False
         for i, article in enumerate(articles):
             displayName = await article.query_selector("[data-testid='User-Name']")
             if displayName:
                 spans = await displayName.query_selector_all("span")
                 time_tag = await displayName.query_selector("time")
-                asyncio.sleep(random.uniform(5.0, 11.5))
                 tweetText_tag = await article.query_selector("[data-testid='tweetText']")
                 if len(spans) > 3 and time_tag and tweetText_tag:
                     if len(spans) == 4:
@@ -72,52 +154,72 @@ class XScraping:
                     dateTime = await time_tag.get_attribute("datetime")
                     tweetText = await tweetText_tag.text_content()
                     tweetText = tweetText.strip()
+                    href = await time_tag.evaluate("t => t.closest('a') ? t.closest('a').getAttribute('href') : null")
+                    tweetId = href.rstrip("/").split("/status/")[-1] if href and "/status/" in href else None
 
-                    if userName and tweetText and dateTime:
-                        try:
-                            dt_naive = datetime.strptime(dateTime, "%Y-%m-%dT%H:%M:%S.%fZ")
-                            now = datetime.now()
-                            key = (userName, tweetText)
-                            if key not in seen_pairs:
-                                seen_pairs.add(key)
-                                all_tweet_entries.append({
-                                    "category": category,
-                                    "tag": tag,
-                                    "username": userName,
-                                    "tweetText": tweetText,
-                                    "postTimeRaw": dt_naive,
-                                    "scrapeTime": now.strftime("%Y-%m-%dT%H:%M:%S")
-                                })
-                                count_tweets += 1
-                                logger.debug(f"Scraped tweet {count_tweets} - {tag}")
-                        except ValueError as e:
-                            logger.error(f"Invalid datetime format: {dateTime} | Error: {e}", exc_info=True)
-                        
+                    reached_watermark |= self._append_entry(category, tag, userName, tweetText, dateTime, tweetId, seen_pairs, all_tweet_entries, watermark, dedup)
                 else:
                     logger.debug("Tweet does not have the expected structure.")
             else:
                 logger.debug("No display name found for the article.")
+        return reached_watermark
+
+    async def extract_articles_batched(self, page, category: str, tag: str, seen_pairs: set, all_tweet_entries: list, watermark: Watermark | None = None, dedup: DedupRegistry | None = None) -> tuple[int, bool]:
+        # One round trip per scroll: every visible article is parsed inside the page
+        rows = await page.evaluate(EXTRACT_ARTICLES_JS)
+        skipped = 0
+        reached_watermark = False
+        for row in rows:
+            if row is None:
+                skipped += 1
+                continue
+            reached_watermark |= self._append_entry(category, tag, row["username"], row["text"], row["datetime"], row["statusId"], seen_pairs, all_tweet_entries, watermark, dedup)
+        if skipped:
+            logger.debug(f"{skipped}/{len(rows)} articles do not have the expected structure.")
+        return len(rows), reached_watermark
+
+    async def extract_timeline(self, capture: TimelineCapture, category: str, tag: str, seen_pairs: set, all_tweet_entries: list, watermark: Watermark | None = None, dedup: DedupRegistry | None = None) -> tuple[int, bool]:
+        tweets = await capture.drain()
+        reached_watermark = False
+        for tweet in tweets:
+            reached_watermark |= self._append_entry(category, tag, tweet["username"], tweet["text"], tweet["datetime"], tweet["statusId"], seen_pairs, all_tweet_entries, watermark, dedup)
+        return len(tweets), reached_watermark
 
-    async def scrape_all_tweet_texts(self, category: str, tag: str, tag_url: str, max_scrolls: int = 10, view_browser: bool = True) -> list[dict]:
-        logger.debug(f"Starting scraping: {tag}")
-        all_tweet_entries = []
+    async def scrape_all_tweet_texts(self, category: str, tag: str, tag_url: str, max_scrolls: int = 10, view_browser: bool = True, pool: BrowserPool | None = None, batch_extract: bool = True, mode: str = "dom", watermark: Watermark | None = None, pacer: AdaptivePacer | None = None, dedup: DedupRegistry | None = None, snapshot_dir: str | None = None) -> list[dict]:
+        return [
+            record
+            async for record in self.iter_tweet_texts(category, tag, tag_url, max_scrolls=max_scrolls, view_browser=view_browser, pool=pool, batch_extract=batch_extract, mode=mode, watermark=watermark, pacer=pacer, dedup=dedup, snapshot_dir=snapshot_dir)
+        ]
+
+    async def iter_tweet_texts(self, category: str, tag: str, tag_url: str, max_scrolls: int = 10, view_browser: bool = True, pool: BrowserPool | None = None, batch_extract: bool = True, mode: str = "dom", watermark: Watermark | None = None, pacer: AdaptivePacer | None = None, dedup: DedupRegistry | None = None, snapshot_dir: str | None = None, raise_on_block: bool = False, on_scroll: Callable[[int], None] | None = None) -> AsyncIterator[dict]:
+        if mode not in SCRAPE_MODES:
+            raise ValueError(f"Unknown scrape mode: {mode} (expected one of {', '.join(SCRAPE_MODES)})")
+        if pool is None:
+            async with BrowserPool(size=1, headless=view_browser) as own_pool:
+                async for record in self.iter_tweet_texts(category, tag, tag_url, max_scrolls=max_scrolls, pool=own_pool, batch_extract=batch_extract, mode=mode, watermark=watermark, pacer=pacer, dedup=dedup, snapshot_dir=snapshot_dir, raise_on_block=raise_on_block, on_scroll=on_scroll):
+                    yield record
+            return
+
+        pacer = pacer or AdaptivePacer()
+        logger.debug(f"Starting scraping: {tag} ({mode} mode)")
+        labels = {"category": category, "tag": tag}
+        tag_started = time.perf_counter()
+        total_tweets = 0
         seen_pairs = set() 
-        count_tweets = 0
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=view_browser)
-            context = await browser.new_context(
-                storage_state=AUTH_TWITTER,
-                viewport={"width": 1280, "height": 1024}
-            )
-            page = await context.new_page()
+        async with pool.lease() as page, TimelineCapture(page, enabled=mode == "network") as capture:
             await page.goto(tag_url, timeout = 120000)
-            await asyncio.sleep(random.uniform(10, 20.0))
+            PAGES_LOADED.labels(**labels).inc()
+            PACING_SECONDS.labels(**labels).inc(await pacer.wait())
+            scroll_started = time.perf_counter()
 
             # Check if the page has loaded tweets
-            if not await self.wait_for_articles_with_retry(page):
+            if not await self.wait_for_articles_with_retry(page, pacer=pacer):
                 logger.error(f"No articles found for tag: {tag} (Initial load)")
-                await browser.close()
-                return all_tweet_entries
+                if not await self.is_empty_result(page):
+                    BLOCKS.labels(**labels).inc()
+                    if raise_on_block:
+                        raise SessionBlockedError(f"No articles for {tag} and no empty-result page")
+                return
 
             now_height = 0
             for i in range(max_scrolls):
@@ -125,49 +227,71 @@ class XScraping:
                     scroll_distance = random.randint(2800, 3800)
                     await page.evaluate(f"window.scrollBy(0, {scroll_distance});")
                     logger.debug(f"Scroll attempt {i+1}/{max_scrolls} - Scrolling by {scroll_distance}px")
-                    await asyncio.sleep(random.uniform(10, 17))
+                    PACING_SECONDS.labels(**labels).inc(await pacer.wait())
+                    scroll_started = time.perf_counter()
                     # Check if the page has loaded tweets
-                    if not await self.wait_for_articles_with_retry(page):
+                    if not await self.wait_for_articles_with_retry(page, pacer=pacer):
                         logger.warning(f"No articles found on scroll {i+1}")
+                        if not await self.is_empty_result(page):
+                            BLOCKS.labels(**labels).inc()
                         break
                 
                 logger.debug(f"Scroll attempt {i+1}/{max_scrolls} - {tag}")
                 new_height = await page.evaluate("document.body.scrollHeight")
-                await asyncio.sleep(random.uniform(9, 14))
                 logger.debug(f"Now height: {now_height} - New height after scroll: {new_height}")
                 
                 if new_height == now_height:
                     logger.debug("Reached bottom of page or no new content loaded.")
+                    pacer.record_empty()
                     break
                 now_height = new_height
 
-                articles = await page.query_selector_all("article")
-                if articles:
-                    await self.extract_articles(category, tag, count_tweets, articles, seen_pairs, all_tweet_entries)
+                # Only this scroll's records are held; they are handed off before the next scroll
+                scroll_entries = []
+                if mode == "network":
+                    found_articles, reached_watermark = await self.extract_timeline(capture, category, tag, seen_pairs, scroll_entries, watermark, dedup)
+                elif batch_extract:
+                    found_articles, reached_watermark = await self.extract_articles_batched(page, category, tag, seen_pairs, scroll_entries, watermark, dedup)
                 else:
+                    articles = await page.query_selector_all("article")
+                    found_articles = len(articles)
+                    reached_watermark = False
+                    if articles:
+                        reached_watermark = await self.extract_articles(category, tag, total_tweets, articles, seen_pairs, scroll_entries, watermark, dedup)
+                if snapshot_dir is not None:
+                    await save_snapshot(page, snapshot_dir, tag, i)
+
+                SCROLLS.labels(**labels).inc()
+                SCROLL_SECONDS.labels(**labels).observe(time.perf_counter() - scroll_started)
+                ARTICLES_SEEN.labels(**labels).inc(found_articles)
+                TWEETS_EXTRACTED.labels(**labels).inc(len(scroll_entries))
+                total_tweets += len(scroll_entries)
+                for record in scroll_entries:
+                    yield record
+                if on_scroll is not None:
+                    # Called once the consumer has taken every record from this scroll
+                    on_scroll(i + 1)
+
+                if not found_articles:
                     logger.debug("No articles found on the page.")
+                    pacer.record_empty()
+                    break
+                pacer.record_success()
+                if reached_watermark:
+                    logger.info(f"Reached watermark for tag: {tag} on scroll {i+1}, stopping early")
                     break
-            
-            await browser.close()
-            logger.info(f"Finished scraping tag: {tag} | Total tweets: {len(all_tweet_entries)}")
 
-        return all_tweet_entries
+        elapsed = time.perf_counter() - tag_started
+        TAG_SECONDS.labels(**labels).observe(elapsed)
+        TWEETS_PER_SECOND.labels(**labels).set(total_tweets / elapsed if elapsed else 0.0)
+        logger.info(f"Finished scraping tag: {tag} | Total tweets: {total_tweets} | Pacing: {pacer.stats()}")
 
     @staticmethod
-    def to_dataframe(all_tweet: list[dict]) -> pd.DataFrame:
+    def to_dataframe(all_tweet: list[dict] | TweetColumns) -> pd.DataFrame:
         logger.info(f"Converting to dataframe...")
-        all_tweet = pd.DataFrame(all_tweet)
-        all_tweet['category'] = all_tweet['category'].astype('string')
-        all_tweet['username'] = all_tweet['username'].astype('string')
-        all_tweet['tweetText'] = all_tweet['tweetText'].astype('string')
-        all_tweet['tag'] = all_tweet['tag'].astype('string')
-
-        all_tweet['year'] = all_tweet['postTimeRaw'].dt.year
-        all_tweet['month'] = all_tweet['postTimeRaw'].dt.month
-        all_tweet['day'] = all_tweet['postTimeRaw'].dt.day
-
-        all_tweet['postTimeRaw'] = pd.to_datetime(all_tweet['postTimeRaw'])
-        all_tweet['scrapeTime'] = pd.to_datetime(all_tweet['scrapeTime'])
+        # category/tag come out as categoricals, postTimeRaw/scrapeTime straight from int64 buffers
+        columns = all_tweet if isinstance(all_tweet, TweetColumns) else TweetColumns.from_records(all_tweet)
+        all_tweet = columns.to_pandas()
         logger.info("Finished converting to dataframe.")
         return all_tweet
 
@@ -341,22 +465,17 @@ async def main():
     tag_urls = x_scraping.encode_tag_to_url(tags)
 
 
-    semaphore = asyncio.Semaphore(3)
     all_results = []
 
-    async def scrape_with_limit(category: str, tag: str, url: str):
-        async with semaphore:
-            result = await x_scraping.scrape_all_tweet_texts(category, tag, url)
-            return result
-        
-    tasks = []
-    for category, tag_url_dict in tag_urls.items():
-        for tag, url in tag_url_dict.items():
-            tasks.append(scrape_with_limit(category, tag, url))
-
-    logger.info(f"Starting scraping with {len(tasks)} tasks, max 3 concurrently...")
-    # tasks = [x_scraping.scrape_all_tweet_texts(tag=tag, tag_url=tag_urls[tag]) for tag in tag_urls.keys()]
-    results = await asyncio.gather(*tasks)
+    async with BrowserPool(size=3) as pool:
+        tasks = []
+        for category, tag_url_dict in tag_urls.items():
+            for tag, url in tag_url_dict.items():
+                tasks.append(x_scraping.scrape_all_tweet_texts(category, tag, url, pool=pool))
+
+        logger.info(f"Starting scraping with {len(tasks)} tasks, max 3 concurrently...")
+        # tasks = [x_scraping.scrape_all_tweet_texts(tag=tag, tag_url=tag_urls[tag]) for tag in tag_urls.keys()]
+        results = await asyncio.gather(*tasks)
 
     for result in results:
         all_results.extend(result)
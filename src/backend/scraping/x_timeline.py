@@ -0,0 +1,143 @@
+import asyncio
+import html
+import re
+from datetime import datetime, timezone
+
+# Import modern logging configuration
+from config.logging.modern_log import LoggingConfig
+
+logger = LoggingConfig(level="DEBUG", level_console="DEBUG").get_logger()
+
+SEARCH_TIMELINE_MARKER = "/SearchTimeline"
+
+# The DOM renders a long link as its expanded URL followed by an ellipsis span
+_URL_ELLIPSIS = re.compile(r"(https?://\S+?)…")
+
+def normalize_tweet_text(text: str) -> str:
+    # Applied to DOM and network text alike, so a tweet gets the same dedup/index key in both modes
+    return _URL_ELLIPSIS.sub(r"\1", text).strip()
+
+def expand_entities(text: str, entities: dict, display_text_range: list[int] | None = None) -> str:
+    # full_text holds t.co links, media links, leading reply mentions and HTML escapes; the DOM shows none of them
+    # Entity indices count an escaped "&amp;" as one character, so unescape before slicing
+    text = html.unescape(text)
+    if display_text_range:
+        text = text[display_text_range[0]:display_text_range[1]]
+    for media in entities.get("media", []):
+        text = text.replace(media.get("url", ""), "") if media.get("url") else text
+    for url in entities.get("urls", []):
+        if url.get("url") and url.get("expanded_url"):
+            text = text.replace(url["url"], url["expanded_url"])
+    return text
+
+class TimelineParser:
+    @staticmethod
+    def parse_created_at(created_at: str) -> str:
+        # X sends "Wed Oct 10 20:19:24 +0000 2018"; normalise to the DOM <time datetime> format
+        dt = datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y").astimezone(timezone.utc)
+        return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+    def parse(self, payload: dict) -> list[dict]:
+        timeline = (
+            payload.get("data", {})
+            .get("search_by_raw_query", {})
+            .get("search_timeline", {})
+            .get("timeline", {})
+        )
+        tweets = []
+        for instruction in timeline.get("instructions", []):
+            entries = instruction.get("entries", [])
+            if "entry" in instruction:
+                entries = [instruction["entry"]]
+            for entry in entries:
+                content = entry.get("content", {})
+                item_contents = [content.get("itemContent")]
+                item_contents += [item.get("item", {}).get("itemContent") for item in content.get("items", [])]
+                for item_content in item_contents:
+                    if not item_content or item_content.get("itemType") != "TimelineTweet":
+                        continue
+                    tweet = self.parse_tweet(item_content.get("tweet_results", {}).get("result", {}))
+                    if tweet:
+                        tweets.append(tweet)
+        return tweets
+
+    def parse_tweet(self, result: dict) -> dict | None:
+        if result.get("__typename") == "TweetWithVisibilityResults":
+            result = result.get("tweet", {})
+        legacy = result.get("legacy")
+        if not legacy:
+            return None
+
+        user = result.get("core", {}).get("user_results", {}).get("result", {})
+        screen_name = user.get("core", {}).get("screen_name") or user.get("legacy", {}).get("screen_name")
+        note = result.get("note_tweet", {}).get("note_tweet_results", {}).get("result", {})
+        if note.get("text"):
+            text = expand_entities(note["text"], note.get("entity_set", {}))
+        elif legacy.get("full_text"):
+            text = expand_entities(legacy["full_text"], legacy.get("entities", {}), legacy.get("display_text_range"))
+        else:
+            text = None
+        if not screen_name or not text or not legacy.get("created_at"):
+            return None
+
+        try:
+            created_at = self.parse_created_at(legacy["created_at"])
+        except ValueError as e:
+            logger.error(f"Invalid created_at format: {legacy['created_at']} | Error: {e}")
+            return None
+
+        return {
+            "username": f"@{screen_name}",
+            "text": normalize_tweet_text(text),
+            "datetime": created_at,
+            "statusId": result.get("rest_id") or legacy.get("id_str"),
+        }
+
+class TimelineCapture:
+    def __init__(self, page, parser: TimelineParser | None = None, enabled: bool = True):
+        self.page = page
+        self.enabled = enabled
+        self.parser = parser or TimelineParser()
+        self.responses = 0
+        self._buffer: list[dict] = []
+        self._pending: set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> "TimelineCapture":
+        if self.enabled:
+            self.page.on("response", self._on_response)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if not self.enabled:
+            return
+        # Pooled pages outlive this scrape, so the listener must not
+        self.page.remove_listener("response", self._on_response)
+        for task in list(self._pending):
+            task.cancel()
+
+    def _on_response(self, response) -> None:
+        if SEARCH_TIMELINE_MARKER not in response.url:
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _read(self, response) -> None:
+        if not response.ok:
+            logger.warning(f"Timeline response {response.status} from {response.url.split('?')[0]}")
+            return
+        try:
+            payload = await response.json()
+        except Exception as e:
+            logger.debug(f"Could not decode timeline response: {e}")
+            return
+        tweets = self.parser.parse(payload)
+        self.responses += 1
+        self._buffer.extend(tweets)
+        logger.debug(f"Captured timeline response {self.responses} with {len(tweets)} tweets")
+
+    async def drain(self) -> list[dict]:
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        tweets, self._buffer = self._buffer, []
+        return tweets
@@ -9,11 +9,19 @@ from config.logging.modern_log import LoggingConfig
 
 logger = LoggingConfig(level="DEBUG", level_console="INFO").get_logger()
 
+# Multi-tag columns hold Python lists, so they are object dtype and unhashable by design
+LIST_COLUMNS = ["tags", "categories"]
+# Optional fields the extractor can't always fill (e.g. no status link); not counted as missing values
+OPTIONAL_COLUMNS = ["tweetId"]
+
 class TweetData(BaseModel):
+    tweetId: Optional[str] = None
     username: str
     tweetText: str
     scrapeTime: datetime
     tag: Optional[str]
+    tags: list[str] = []
+    categories: list[str] = []
     postTimeRaw: datetime
     # postTime: datetime
     year: int
@@ -45,6 +53,8 @@ class ValidationPydantic:
 
     def validate(self, df: pd.DataFrame, scrape_new: bool = False) -> bool:
         all_valid = True
+        scalar_df = df.drop(columns=[col for col in LIST_COLUMNS if col in df.columns])
+        required_df = scalar_df.drop(columns=[col for col in OPTIONAL_COLUMNS if col in scalar_df.columns])
         for idx, row in df.iterrows():
             data_dict = row.to_dict()
             try:
@@ -57,18 +67,18 @@ class ValidationPydantic:
         if scrape_new:
             # Validation
             dataset_checks = {
-                f"No Missing Values missing: {df.isnull().sum().sum()}": df.isnull().sum().sum() == 0,
-                f"No 'object' dtype columns columns: {', '.join(f'{k}: {v}' for k, v in df.dtypes.items() if v == 'object')}": not any(df.dtypes == 'object'),
-                f"No Duplicate Rows duplicates: {df.duplicated().sum()}": df.duplicated().sum() == 0,
+                f"No Missing Values missing: {required_df.isnull().sum().sum()}": required_df.isnull().sum().sum() == 0,
+                f"No 'object' dtype columns columns: {', '.join(f'{k}: {v}' for k, v in scalar_df.dtypes.items() if v == 'object')}": not any(scalar_df.dtypes == 'object'),
+                f"No Duplicate Rows duplicates: {scalar_df.duplicated().sum()}": scalar_df.duplicated().sum() == 0,
             }
         else:
             # Validation
             dataset_checks = {
                 f"Record Count (≥1000) records: {len(df)}": len(df) >= 1000,
                 f"Time Span (≥24 hours) min: {pd.to_datetime(df['postTimeRaw']).min()} max: {pd.to_datetime(df['postTimeRaw']).max()}": self._check_time_span(df),
-                f"No Missing Values missing: {df.isnull().sum().sum()}": df.isnull().sum().sum() == 0,
-                f"No 'object' dtype columns columns: {', '.join(f'{k}: {v}' for k, v in df.dtypes.items() if v == 'object')}": not any(df.dtypes == 'object'),
-                f"No Duplicate Rows duplicates: {df.duplicated().sum()}": df.duplicated().sum() == 0,
+                f"No Missing Values missing: {required_df.isnull().sum().sum()}": required_df.isnull().sum().sum() == 0,
+                f"No 'object' dtype columns columns: {', '.join(f'{k}: {v}' for k, v in scalar_df.dtypes.items() if v == 'object')}": not any(scalar_df.dtypes == 'object'),
+                f"No Duplicate Rows duplicates: {scalar_df.duplicated().sum()}": scalar_df.duplicated().sum() == 0,
             }
 
         failed_checks = [k for k, v in dataset_checks.items() if not v]
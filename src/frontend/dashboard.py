@@ -1,6 +1,13 @@
 import streamlit as st
 import os
+import sys
 import pandas as pd
+from pathlib import Path
+
+# streamlit only puts this file's directory on the path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+# Import the tweets dataset schema
+from src.backend.load.parquet_profiles import TWEET_SCHEMA
 
 # Define the data fetching function
 def data_from_lakefs(lakefs_endpoint: str = "http://localhost:8001/"):
@@ -16,7 +23,11 @@ def data_from_lakefs(lakefs_endpoint: str = "http://localhost:8001/"):
         "s3://tweets-repo/main/tweets.parquet",  # Replace with your actual path
         storage_options=storage_options,
         engine='pyarrow',
+        # Older partitions lack tags/categories/tweetId; without this the first file read decides the columns
+        schema=TWEET_SCHEMA,
     )
+    # Rows from before multi-tag dedup carry only their single tag
+    df["tags"] = [tags if tags is not None else [tag] for tags, tag in zip(df["tags"], df["tag"])]
 
     # Add year and month columns
     df["postTimeRaw"] = pd.to_datetime(df["postTimeRaw"])
@@ -40,8 +51,10 @@ def show_dashboard():
     
     df_filtered = df[(df["year"] >= start_year) & (df["year"] <= end_year)]
     
-    # Count tags per month
-    if 'tag' in df.columns:
+    # Count tags per month; a tweet carrying several tracked tags counts once per tag
+    if 'tags' in df.columns:
+        tag_counts = df_filtered.explode("tags").groupby("month")["tags"].count().reset_index(name="count")
+    elif 'tag' in df.columns:
         tag_counts = df_filtered.groupby("month")["tag"].count().reset_index(name="count")
     else:
         tag_counts = df_filtered.groupby("month").size().reset_index(name="count")
@@ -9,4 +9,10 @@ echo "== Run incremental scrape flow =="
 read -p "Run incremental scrape flow? (y/n): " run_incremental
 if [[ $run_incremental == "y" ]]; then
     python src/backend/pipeline/incremental_scrape_flow.py
+fi
+
+echo "== Deploy daily compaction flow =="
+read -p "Deploy compaction flow? (y/n): " run_compaction
+if [[ $run_compaction == "y" ]]; then
+    python src/backend/pipeline/compaction_flow.py
 fi
\ No newline at end of file
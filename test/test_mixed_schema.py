@@ -0,0 +1,64 @@
+import pandas as pd
+
+# Import LakeFS loader
+from src.backend.load.lakefs_loader import LakeFSLoader
+# Import storage backends
+from src.backend.load.storage import LocalBackend
+
+PATH = "s3://tweets-repo/main/tweets.parquet"
+
+def old_batch() -> pd.DataFrame:
+    # Written before multi-tag dedup: no tags/categories/tweetId, plain string category/tag
+    return pd.DataFrame({
+        "category": ["การศึกษา"],
+        "tag": ["#TCAS"],
+        "username": ["old_user"],
+        "tweetText": ["old tweet"],
+        "postTimeRaw": pd.to_datetime(["2025-01-01 08:00"]),
+        "scrapeTime": pd.to_datetime(["2025-01-03 08:00"]),
+        "year": [2025], "month": [1], "day": [1],
+    })
+
+def new_batch() -> pd.DataFrame:
+    return pd.DataFrame({
+        "category": pd.Categorical(["ธรรมศาสตร์"]),
+        "tag": pd.Categorical(["#มธ"]),
+        "categories": [["ธรรมศาสตร์", "การศึกษา"]],
+        "tags": [["#มธ", "#TCAS"]],
+        "tweetId": pd.array(["1875000000000000000"], dtype="string"),
+        "username": ["new_user"],
+        "tweetText": ["new tweet"],
+        "postTimeRaw": pd.to_datetime(["2025-01-02 08:00"]),
+        "scrapeTime": pd.to_datetime(["2025-01-03 08:00"]),
+        "year": [2025], "month": [1], "day": [2],
+    })
+
+def mixed_loader(tmp_path) -> LakeFSLoader:
+    # The old partition sorts first, so it is the file pyarrow would take the schema from
+    loader = LakeFSLoader(backend=LocalBackend(tmp_path / "lakefs"), key_index_dir=tmp_path / "key_index")
+    loader.load(old_batch(), None, lakefs_s3_path=PATH)
+    loader.load(new_batch(), None, lakefs_s3_path=PATH)
+    return loader
+
+def test_read_keeps_columns_of_newer_partitions(tmp_path):
+    data = mixed_loader(tmp_path).read(None, PATH).sort_values("postTimeRaw", ignore_index=True)
+
+    assert {"tags", "categories", "tweetId"}.issubset(data.columns)
+    assert data["tags"][0] is None
+    assert list(data["tags"][1]) == ["#มธ", "#TCAS"]
+    assert data["tweetId"].tolist() == [None, "1875000000000000000"]
+    assert data["tag"].tolist() == ["#TCAS", "#มธ"]
+
+def test_filtered_read_of_old_partition_has_new_columns(tmp_path):
+    data = mixed_loader(tmp_path).read(None, PATH, columns=["tweetText", "tags"], filters=[[("day", "=", 1)]])
+
+    assert data.columns.tolist() == ["tweetText", "tags"]
+    assert data["tweetText"].tolist() == ["old tweet"]
+
+def test_anti_join_against_mixed_partitions(tmp_path):
+    loader = mixed_loader(tmp_path)
+    batch = pd.concat([old_batch(), new_batch().assign(tweetText="another tweet")], ignore_index=True)
+
+    new_rows = loader._anti_join(batch, None, PATH, on=["postTimeRaw", "username", "tweetText"])
+
+    assert new_rows["tweetText"].tolist() == ["another tweet"]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+# Import LakeFS loader
+from src.backend.load.lakefs_loader import LakeFSLoader
+# Import storage backends
+from src.backend.load.storage import LocalBackend
+# Import dedup key hashing
+from src.backend.load.key_index import hash_keys
+
+PATH = "s3://tweets-repo/main/tweets.parquet"
+
+def tweets(size: int, offset: int = 0) -> pd.DataFrame:
+    # One tweet every 10 minutes from 2025-01-01, so 144 per day
+    post_time = pd.Series(pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(offset, offset + size) * 600, unit="s"))
+    return pd.DataFrame({
+        "category": "การศึกษา",
+        "tag": "#TCAS",
+        "username": [f"user{i % 50}" for i in range(offset, offset + size)],
+        "tweetText": [f"tweet {i}" for i in range(offset, offset + size)],
+        "postTimeRaw": post_time,
+        "scrapeTime": pd.Timestamp("2025-01-10"),
+        "year": post_time.dt.year,
+        "month": post_time.dt.month,
+        "day": post_time.dt.day,
+    })
+
+def local_loader(tmp_path) -> LakeFSLoader:
+    return LakeFSLoader(backend=LocalBackend(tmp_path / "lakefs"), key_index_dir=tmp_path / "key_index")
+
+def test_late_tweet_keeps_partition_tree_current(tmp_path):
+    loader = local_loader(tmp_path)
+    loader.load(tweets(400), None, lakefs_s3_path=PATH)
+    # A late tweet for day 1 arrives after the day's tree was first recorded
+    late = tweets(1, offset=100).assign(tweetText="late tweet")
+    loader.incremental_load(late, None, lakefs_s3_path=PATH)
+
+    stored = pd.concat([tweets(400), late], ignore_index=True)
+    assert loader.changed_partitions(stored, None, PATH) == []
+    assert loader.sync(stored, None, lakefs_s3_path=PATH) == []
+
+def test_sync_drops_rewritten_keys_from_index(tmp_path):
+    loader = local_loader(tmp_path)
+    loader.load(tweets(400), None, lakefs_s3_path=PATH)
+    corrected = tweets(400)
+    corrected.loc[0, "tweetText"] = "corrected tweet"
+
+    assert loader.sync(corrected, None, lakefs_s3_path=PATH) == ["year=2025/month=1/day=1"]
+
+    index = loader.key_index(None, PATH)
+    assert not index.contains(hash_keys(tweets(1)))[0]
+    assert index.contains(hash_keys(corrected.iloc[:1]))[0]
+    assert len(index) == 400